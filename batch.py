@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+"""
+Solve many mazes with many runners in parallel
+
+@author: Alex-932
+@version: 0.1
+"""
+
+from mazy import mazy
+from concurrent.futures import ProcessPoolExecutor
+import csv
+
+columns = ["Maze", "Runner", "Steps", "Duration", "Start distance"]
+#Columns of the table returned by solve_batch.
+
+def solve_maze(job):
+    """
+    Build (or load) one maze and run all the runners on it. Runs in the
+    worker processes, only the table rows are sent back.
+
+    Parameters
+    ----------
+    job : tuple
+        Maze id, maze description (see solve_batch) and list of runners.
+
+    Returns
+    -------
+    list of dict
+        One row per runner.
+
+    """
+    maze_id, description, runners = job
+    if isinstance(description, str) :
+        maze = mazy(file=description, headless=True)
+    elif isinstance(description, dict) :
+        maze = mazy(headless=True, **description)
+    else :
+        maze = mazy(*description, headless=True)
+    rows = []
+    for runner in runners :
+        if maze.start_distance is None :
+            steps, duration = None, None
+            #The exit can't be reached so the runner isn't run.
+        else :
+            maze.maze_runner(runner)
+            journey = list(maze.runner_path.values())[-1]
+            steps, duration = journey["Distance"], journey["Duration"]
+        rows.append(dict(zip(columns, [maze_id, runner, steps, duration, \
+                                       maze.start_distance])))
+    return rows
+
+def solve_batch(mazes, runners, processes=None):
+    """
+    Solve the given mazes with the given runners, the mazes being spread
+    across a pool of processes.
+
+    Parameters
+    ----------
+    mazes : list or dict
+        Mazes to solve, a dict gives them an id, else their index is used.
+        Each maze is either a file path (str), a tuple of mazy positional
+        arguments like (x, y, workman) or a dict of mazy keyword arguments.
+    runners : list of str
+        Names of the runners, for example ["ICR", "IGR", "IAE"].
+    processes : int, optional
+        Number of worker processes. The default is None (one per CPU).
+        With 1, everything is run in the current process.
+
+    Returns
+    -------
+    list of dict
+        Table with one row per maze and runner, see batch.columns.
+
+    """
+    if not isinstance(mazes, dict) :
+        mazes = dict(enumerate(mazes))
+    jobs = [(maze_id, description, list(runners)) \
+            for maze_id, description in mazes.items()]
+    if processes == 1 :
+        results = map(solve_maze, jobs)
+        return [row for rows in results for row in rows]
+    with ProcessPoolExecutor(max_workers=processes) as pool :
+        results = pool.map(solve_maze, jobs)
+        return [row for rows in results for row in rows]
+
+def to_csv(table, file):
+    """
+    Write a table returned by solve_batch in a .csv file.
+
+    Parameters
+    ----------
+    table : list of dict
+        Rows of the table.
+    file : str
+        Path of the output file.
+
+    Returns
+    -------
+    None.
+
+    """
+    with open(file, "w", newline="") as output :
+        writer = csv.DictWriter(output, fieldnames=columns)
+        writer.writeheader()
+        writer.writerows(table)
+
+
+if __name__ == "__main__":
+    table = solve_batch([(31, 21, "IDE"), (61, 41, "IPR"), \
+                         "trial_maze_2.txt"], \
+                        ["ICR", "IGR", "IGL", "IAE", "IFS"])
+    for row in table :
+        print(row)
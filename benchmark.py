@@ -0,0 +1,207 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark suite for maze generation, coloration, solving and file handling
+
+Each measurement is printed as one JSON object per line, for example :
+python benchmark.py --sizes 31x21 101x101 --output bench_output.txt
+
+@author: Alex-932
+@version: 0.1
+"""
+
+from grid import grid
+from mazy import mazy
+import argparse
+import json
+import numpy
+import os
+import random
+import sys
+import tempfile
+import time
+
+sizes = [(31, 21), (101, 101), (301, 301), (1001, 1001), (3001, 3001)]
+#Default size ladder.
+workmen = ["IDE", "IGS", "IPR", "IDD", "IBE", "IGT", "ISR", "tiler", \
+           "gateman"]
+runners = ["ICR", "IGR", "IGL", "IAE", "IFS", "IAS", "IMM", "IFD"]
+#Every runner of mazy.runner_selector and mazy.solvers.
+
+def reseed(seed):
+    """
+    Seed the random generators used by grid and mazy.
+
+    Parameters
+    ----------
+    seed : int
+        Seed.
+
+    Returns
+    -------
+    None.
+
+    """
+    random.seed(seed)
+    numpy.random.seed(seed)
+
+def measure(function, repeat, seed):
+    """
+    Time a function, the random generators being reseeded before each call.
+
+    Parameters
+    ----------
+    function : callable
+        Function to time, called without arguments.
+    repeat : int
+        Number of calls.
+    seed : int
+        Seed.
+
+    Returns
+    -------
+    float
+        Fastest duration in seconds.
+    result
+        What the last call returned.
+
+    """
+    best = None
+    for k in range(repeat):
+        reseed(seed)
+        start_time = time.perf_counter()
+        result = function()
+        duration = time.perf_counter()-start_time
+        best = duration if best is None else min(best, duration)
+    return best, result
+
+def record(output, benchmark, variant, size, cells, duration, seed):
+    """
+    Write one measurement as a JSON line.
+
+    Parameters
+    ----------
+    output : file
+        Where the line is written.
+    benchmark : str
+        Name of the measured method.
+    variant : str
+        Workman, runner or "" for the methods without variant.
+    size : tuple
+        (x, y) size of the maze.
+    cells : int
+        Number of processed cells, used for the throughput.
+    duration : float
+        Duration in seconds.
+    seed : int
+        Seed.
+
+    Returns
+    -------
+    None.
+
+    """
+    output.write(json.dumps({
+        "benchmark": benchmark,
+        "variant": variant,
+        "x": size[0],
+        "y": size[1],
+        "cells": cells,
+        "seconds": duration,
+        "cells_per_second": cells/duration if duration > 0 else None,
+        "seed": seed}) + "\n")
+    output.flush()
+
+def run(size, output, seed=0, repeat=1, workmen=workmen, runners=runners):
+    """
+    Run every benchmark on one maze size.
+
+    Parameters
+    ----------
+    size : tuple
+        (x, y) size of the maze.
+    output : file
+        Where the measurements are written.
+    seed : int, optional
+        Seed. The default is 0.
+    repeat : int, optional
+        Number of calls of each benchmark, the fastest is kept.
+        The default is 1.
+    workmen : list of str, optional
+        Workmen to benchmark. The default is every workman.
+    runners : list of str, optional
+        Runners to benchmark. The default is every runner.
+
+    Returns
+    -------
+    None.
+
+    """
+    (x, y) = size
+    cells = x*y
+    solvable = None
+    #Maze used for the runners and the file benchmarks.
+    for workman in workmen :
+        duration, maze = measure(lambda : mazy(x, y, workman, \
+                                               headless=True, \
+                                               analyse=False), repeat, seed)
+        record(output, "maze_builder", workman, size, cells, duration, seed)
+        #Only the carving is timed, the adjacency and the distances are 
+        #timed on their own below.
+        duration, _ = measure(maze.compute_path_neighbors, repeat, seed)
+        record(output, "compute_path_neighbors", workman, size, cells, \
+               duration, seed)
+        duration, _ = measure(maze.maze_coloration, repeat, seed)
+        record(output, "maze_coloration", workman, size, cells, duration, \
+               seed)
+        if solvable is None and maze.start_distance is not None :
+            solvable = maze
+    if solvable is None :
+        reseed(seed)
+        solvable = mazy(x, y, "IPR", headless=True)
+    for runner in runners :
+        duration, _ = measure(lambda : solvable.maze_runner(runner), \
+                              repeat, seed)
+        record(output, "maze_runner", runner, size, cells, duration, seed)
+    with tempfile.TemporaryDirectory() as directory :
+        file = os.path.join(directory, "maze.txt")
+        duration, _ = measure(lambda : solvable.maze.export("Original", \
+                              file=file), repeat, seed)
+        record(output, "grid.export", "", size, cells, duration, seed)
+        loaded = grid(x, y)
+        duration, _ = measure(lambda : loaded.import_file(file), repeat, seed)
+        record(output, "grid.import_file", "", size, cells, duration, seed)
+    duration, _ = measure(lambda : grid.upscale(\
+                          solvable.maze.saved["Original"]), repeat, seed)
+    record(output, "grid.upscale", "", size, cells, duration, seed)
+
+def main(arguments=None):
+    parser = argparse.ArgumentParser(description="Benchmark suite of the "\
+                                     "maze generation, coloration, solving "\
+                                     "and file handling.")
+    parser.add_argument("--sizes", nargs="+", default=None,
+                        help="Sizes as XxY, default : {}".format(" ".join(\
+                            "{}x{}".format(*k) for k in sizes)))
+    parser.add_argument("--workmen", nargs="+", default=workmen)
+    parser.add_argument("--runners", nargs="+", default=runners)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--output", default=None,
+                        help="File the JSON lines are appended to, "\
+                            "default : standard output")
+    arguments = parser.parse_args(arguments)
+    ladder = sizes if arguments.sizes is None else \
+        [tuple(int(k) for k in size.lower().split("x")) \
+         for size in arguments.sizes]
+    output = sys.stdout if arguments.output is None \
+        else open(arguments.output, "a")
+    try :
+        for size in ladder :
+            run(size, output, arguments.seed, arguments.repeat, \
+                arguments.workmen, arguments.runners)
+    finally :
+        if output is not sys.stdout :
+            output.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+# -*- coding: utf-8 -*-
+"""
+On-disk cache of seeded mazes and their derived fields
+
+@author: Alex-932
+@version: 0.1
+"""
+
+import hashlib
+import json
+import numpy
+import os
+import zipfile
+
+class cache():
+    """
+    Directory of .npz files, one per maze, named after a hash of the
+    parameters that fully determine a seeded maze.
+    """
+
+    version = 1
+    #Changed when the generators or the stored fields change, so older
+    #entries are no longer found.
+
+    def __init__(self, directory):
+        """
+        Initialize the cache, the directory is created if needed.
+
+        Parameters
+        ----------
+        directory : str
+            Directory of the cached mazes.
+
+        Returns
+        -------
+        None.
+
+        """
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def key(x, y, workman, tor, seed):
+        """
+        Give the key of a maze.
+
+        Parameters
+        ----------
+        x : int
+            X size of the maze.
+        y : int
+            Y size of the maze.
+        workman : str
+            Workman carving the maze.
+        tor : bool
+            Toroidal maze or not.
+        seed : int
+            Seed of the maze.
+
+        Returns
+        -------
+        str
+            sha256 of the parameters, as hexadecimal.
+
+        """
+        parameters = json.dumps([int(x), int(y), str(workman), bool(tor), \
+                                 int(seed), cache.version])
+        return hashlib.sha256(parameters.encode()).hexdigest()
+
+    def path(self, key):
+        """
+        Give the path of the file of a key.
+
+        Parameters
+        ----------
+        key : str
+            Key of the maze.
+
+        Returns
+        -------
+        str
+
+        """
+        return os.path.join(self.directory, key+".npz")
+
+    def load(self, key):
+        """
+        Load the fields of a cached maze.
+
+        Parameters
+        ----------
+        key : str
+            Key of the maze.
+
+        Returns
+        -------
+        dict or None
+            Arrays of the maze, None if it isn't cached (or the file can't
+            be read).
+
+        """
+        try :
+            with numpy.load(self.path(key)) as entry :
+                return {name: entry[name] for name in entry.files}
+        except (OSError, ValueError, zipfile.BadZipFile) :
+            return None
+
+    def store(self, key, fields):
+        """
+        Write the fields of a maze. The file is written next to its final
+        path then renamed, so readers never see a partial file.
+
+        Parameters
+        ----------
+        key : str
+            Key of the maze.
+        fields : dict
+            Arrays of the maze.
+
+        Returns
+        -------
+        None.
+
+        """
+        path = self.path(key)
+        temporary = "{}.{}.tmp".format(path, os.getpid())
+        with open(temporary, "wb") as output :
+            numpy.savez_compressed(output, **fields)
+        os.replace(temporary, path)
@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+"""
+Frontier class used by the drillerman to pick the next cell to drill from
+
+@author: Alex-932
+@version: 0.1
+"""
+
+from collections import deque
+import random
+
+class frontier():
+    """
+    Container of the cells the drillerman can continue from. Every pick is
+    done in constant time whatever the size of the frontier.
+    """
+
+    modes = ["random", "stack", "ends", "tree"]
+
+    def __init__(self, mode="random", weight=.5, cells=None, \
+                 generator=None):
+        """
+        Initialize an empty frontier.
+
+        Parameters
+        ----------
+        mode : str, optional
+            How the next cell is picked. The default is "random".
+            "random" : uniformly random cell (swap-remove).
+            "stack" : newest cell.
+            "ends" : newest or oldest cell, with the same probability.
+            "tree" : newest cell with a probability of weight,
+            else a random one (growing tree).
+        weight : float, optional
+            Probability of picking the newest cell in "tree" mode.
+            The default is .5.
+        cells : list of tuple, optional
+            Cells the frontier starts with.
+        generator : random.Random, optional
+            Random generator of the picks. The default is None (the random
+            module).
+
+        Returns
+        -------
+        None.
+
+        """
+        if mode not in frontier.modes :
+            raise ValueError("Unknown frontier mode.")
+        self._mode = mode
+        self._weight = float(weight)
+        self._random = random if generator is None else generator
+        if mode == "ends" :
+            self._cells = deque()
+        else :
+            self._cells = []
+        if cells is not None :
+            self.extend(cells)
+
+    def __len__(self):
+        return len(self._cells)
+
+    def extend(self, cells):
+        """
+        Add the given cells to the frontier, the last one being the newest.
+
+        Parameters
+        ----------
+        cells : list of tuple
+            Coordinates of the cells.
+
+        Returns
+        -------
+        None.
+
+        """
+        self._cells.extend(cells)
+
+    def pop_random(self):
+        """
+        Remove and return a random cell. The last cell is moved in place of
+        the chosen one so nothing has to be shifted.
+
+        Returns
+        -------
+        tuple
+            Coordinates of the cell.
+
+        """
+        cells = self._cells
+        index = self._random.randrange(len(cells))
+        last = cells.pop()
+        if index == len(cells) :
+            return last
+        cell, cells[index] = cells[index], last
+        return cell
+
+    def pop(self):
+        """
+        Remove and return the next cell according to the frontier mode.
+
+        Returns
+        -------
+        tuple
+            Coordinates of the cell.
+
+        """
+        if self._mode == "random" :
+            return self.pop_random()
+        elif self._mode == "stack" :
+            return self._cells.pop()
+        elif self._mode == "ends" :
+            if self._random.randrange(0, 2) == 0 :
+                return self._cells.popleft()
+            return self._cells.pop()
+        else :
+            if self._random.random() < self._weight :
+                return self._cells.pop()
+            return self.pop_random()
@@ -6,9 +6,15 @@ Grid class to make working with numpy arrays much easier
 @Version : 2.1.1
 """
 import numpy
-import matplotlib.pyplot as plt
+from collections import OrderedDict
+from collections.abc import Mapping, Sequence
 from datetime import datetime
-import re
+from snapshots import snapshots
+from functools import lru_cache
+import mmap
+import os
+import struct
+import zlib
 
 class grid():
     """
@@ -16,7 +22,7 @@ class grid():
     """
     
     def __init__(self, x, y, tor=False, value=0, dist="fixed", rep=.5, \
-                 file=''):
+                 file='', budget=None, seed=None):
         """
         Initialize a grid with a size of x*y.
 
@@ -29,6 +35,10 @@ class grid():
         dist : (Str) Distribution of the value within the grid.
         Parameters : "random", "fixed" (one value only)
         rep : (Float) Probability of having the first value of the value
+        budget : (Int) Memory budget (bytes) of the saved grids, the least
+        recently used ones are evicted first (see snapshots).
+        seed : (Int) Seed of the "random" distribution, None for the global
+        numpy.random state.
         
         Returns
         -------
@@ -39,66 +49,323 @@ class grid():
         self._dist = str(dist)
         self._rep = float(rep)
         self._tor = tor
-        self.fig, self.ax = plt.subplots(figsize=(16, 16))
+        self.fig, self.ax = None, None
+        #The figure is only created when the grid is displayed.
         self.neighbors = 1
+        self._neighbors_key = None
+        #(length, pattern, tor) of the neighbors in self.neighbors.
         if file != '':
             self._tor = tor
-            self.import_file(file)
+            if grid.is_binary(file) :
+                self.import_binary(file)
+            else :
+                self.import_file(file)
         elif self._dist == "fixed" and type(value) == int :
             self.grid = numpy.ones([self._y, self._x])*value
         elif self._dist == "random" and type(value) == list :
-            self.grid = numpy.random.choice(
+            rng = numpy.random if seed is None else \
+                numpy.random.default_rng(seed)
+            self.grid = rng.choice(
                 value, size = [self._y, self._x], p=[(1-rep), rep])
         else :
             raise ValueError("Wrong set of parameters")
-        self.saved = {}
+        self.saved = snapshots(budget=budget)
+        #The saved grids are stored as deltas against "Original".
         self.coordinates()
         
-    def import_file(self, file):
+    mmap_threshold = 64*2**20
+    #Size (bytes) from which maze files are memory-mapped instead of read.
+    
+    def import_file(self, file, use_mmap=None):
         """
-        Import a file
+        Import a file where each line is a row of the grid and each character
+        is the value (0-9) of a cell. The whole file is converted at once 
+        from its bytes.
 
         Parameters
         ----------
         file : str
             File path.
+        use_mmap : bool, optional
+            Memory-map the file instead of reading it. The default is None,
+            which memory-maps files larger than grid.mmap_threshold.
 
         Returns
         -------
         None.
 
         """
-        raw_file = open(file)
-        raw_lines = raw_file.readlines()
-        lines = [list(re.split('\n', k)[0]) for k in raw_lines]
-        for sublist in lines :
-            for index in range(len(sublist)) :
-                sublist[index] = int(sublist[index])
-        self._x = len(lines[0])
-        self._y = len(lines)
+        with open(file, "rb") as raw_file :
+            size = os.fstat(raw_file.fileno()).st_size
+            if use_mmap is None :
+                use_mmap = size >= grid.mmap_threshold
+            if use_mmap and size != 0 :
+                buffer = mmap.mmap(raw_file.fileno(), 0, \
+                                   access=mmap.ACCESS_READ)
+            else :
+                buffer = raw_file.read()
+        failure = None
         try :
-            self.grid = numpy.array(lines)
-        except :
-             print("Something went wrong with the file !")
+            self.grid = grid.parse_bytes(numpy.frombuffer(buffer, \
+                                                          dtype=numpy.uint8))
+        except Exception as error :
+            failure = error.with_traceback(None)
+            #The traceback holds views of the map, it would keep it from 
+            #being closed.
+        if use_mmap and size != 0 :
+            buffer.close()
+        if failure is not None :
+            raise failure
+        self._y, self._x = self.grid.shape
+        
+    @staticmethod
+    def parse_bytes(raw):
+        """
+        Convert the bytes of a maze file into an array.
+
+        Parameters
+        ----------
+        raw : numpy.ndarray
+            uint8 array of the file content.
+
+        Returns
+        -------
+        numpy.ndarray
+            The grid, as integers.
+
+        """
+        end = len(raw)
+        while end != 0 and raw[end-1] in (10, 13) :
+            end -= 1
+        #Trailing line breaks are ignored.
+        if end == 0 :
+            raise ValueError("The file is empty !")
+        breaks = numpy.flatnonzero(raw[:end] == 10)
+        #Position of the "\n" ending each row, the last row has none.
+        length = int(breaks[0])+1 if len(breaks) != 0 else end+1
+        #Length of a row, line break included.
+        width = length-1
+        if width != 0 and raw[width-1] == 13 :
+            width -= 1
+            #Windows line breaks ("\r\n").
+        row_count = len(breaks)+1
+        if numpy.any(breaks != numpy.arange(1, row_count)*length-1) \
+            or end-(row_count-1)*length != width :
+            raise ValueError("All the rows must have the same width !")
+        if len(raw) >= row_count*length :
+            lines = raw[:row_count*length]
+        else :
+            lines = numpy.concatenate([raw[:end], numpy.full(\
+                            row_count*length-end, 10, dtype=numpy.uint8)])
+            #The last row gets its missing line break.
+        values = lines.reshape(row_count, length)[:, :width] - ord('0')
+        if numpy.any(values > 9) :
+            raise ValueError("The file contains non-digit characters !")
+        return values.astype(numpy.int_)
              
+    binary_magic = b"MAZY"
+    binary_header = struct.Struct("<4sBB2x8s6q")
+    #Header of the binary format : magic, version, layout, dtype, width, 
+    #height, start (x, y) and exit (x, y) (-1 when there is none).
+    binary_layouts = ["packed", "raw"]
+    #"packed" : one bit per cell (path or wall), rows padded to a byte.
+    #"raw" : the array itself, for non binary grids like distance fields.
+    
+    @staticmethod
+    def is_binary(file):
+        """
+        Check whether the file is in the binary format.
+
+        Parameters
+        ----------
+        file : str
+            File path.
+
+        Returns
+        -------
+        bool
+
+        """
+        with open(file, "rb") as raw_file :
+            return raw_file.read(len(grid.binary_magic)) == grid.binary_magic
+    
+    @staticmethod
+    def read_header(file):
+        """
+        Read the header of a binary file.
+
+        Parameters
+        ----------
+        file : str
+            File path.
+
+        Returns
+        -------
+        dict
+            "layout", "dtype", "shape" (y, x), "start" and "exit" (tuple or 
+            None), "row_bytes" and "offset" of the data.
+
+        """
+        with open(file, "rb") as raw_file :
+            raw = raw_file.read(grid.binary_header.size)
+        if len(raw) != grid.binary_header.size :
+            raise ValueError("The file is too short to be a binary maze !")
+        magic, version, layout, dtype, x, y, sx, sy, ex, ey = \
+            grid.binary_header.unpack(raw)
+        if magic != grid.binary_magic or version != 1 :
+            raise ValueError("Not a binary maze file (or unknown version) !")
+        dtype = numpy.dtype(dtype.rstrip(b"\0").decode())
+        layout = grid.binary_layouts[layout]
+        return {"layout": layout, 
+                "dtype": dtype, 
+                "shape": (y, x),
+                "start": (sx, sy) if sx >= 0 else None,
+                "exit": (ex, ey) if ex >= 0 else None,
+                "row_bytes": (x+7)//8 if layout == "packed" \
+                    else x*dtype.itemsize,
+                "offset": grid.binary_header.size}
+    
+    @staticmethod
+    def read_rows(file, start=0, stop=None):
+        """
+        Read some rows of a binary file. The file is memory-mapped so only 
+        those rows are read from the disk.
+
+        Parameters
+        ----------
+        file : str
+            File path.
+        start : int, optional
+            First row. The default is 0.
+        stop : int, optional
+            Row after the last one. The default is None (last row).
+
+        Returns
+        -------
+        numpy.ndarray
+            The rows, with the start and exit values (2 and 3) restored in 
+            the packed layout.
+
+        """
+        header = grid.read_header(file)
+        (y, x) = header["shape"]
+        start, stop, _ = slice(start, stop).indices(y)
+        stop = max(start, stop)
+        if header["layout"] == "raw" :
+            data = numpy.memmap(file, dtype=header["dtype"], mode="r", \
+                                offset=header["offset"], shape=(y, x))
+            return numpy.array(data[start:stop])
+        data = numpy.memmap(file, dtype=numpy.uint8, mode="r", \
+                            offset=header["offset"], \
+                            shape=(y, header["row_bytes"]))
+        rows = numpy.unpackbits(data[start:stop], axis=1, count=x)\
+            .astype(header["dtype"])
+        for value, coord in [(2, header["start"]), (3, header["exit"])]:
+            if coord is not None and start <= coord[1] < stop :
+                rows[coord[1]-start, coord[0]] = value
+        return rows
+    
+    def import_binary(self, file, use_mmap=True):
+        """
+        Import a binary file (see grid.export_binary). With use_mmap, raw 
+        grids are memory-mapped (copy-on-write) so they open instantly and 
+        only the rows that are used are read from the disk.
+
+        Parameters
+        ----------
+        file : str
+            File path.
+        use_mmap : bool, optional
+            Memory-map the file. The default is True.
+
+        Returns
+        -------
+        None.
+
+        """
+        header = grid.read_header(file)
+        (y, x) = header["shape"]
+        if header["layout"] == "raw" and use_mmap :
+            self.grid = numpy.memmap(file, dtype=header["dtype"], mode="c", \
+                                     offset=header["offset"], shape=(y, x))
+        elif use_mmap :
+            self.grid = grid.read_rows(file)
+        else :
+            with open(file, "rb") as raw_file :
+                raw_file.seek(header["offset"])
+                data = numpy.frombuffer(raw_file.read(y*header["row_bytes"]),\
+                                        dtype=numpy.uint8)
+            if header["layout"] == "raw" :
+                self.grid = data.view(header["dtype"]).reshape(y, x).copy()
+            else :
+                self.grid = numpy.unpackbits(data.reshape(y, -1), axis=1, \
+                                        count=x).astype(header["dtype"])
+                for value, coord in [(2, header["start"]), \
+                                     (3, header["exit"])]:
+                    if coord is not None :
+                        self.grid[coord[1], coord[0]] = value
+        self._y, self._x = y, x
+        
+    def cell_indices(self, coord):
+        """
+        Convert coordinates given as an array into flat indices 
+        (y*x_size + x).
+
+        Parameters
+        ----------
+        coord : numpy.ndarray
+            Array of shape (n, 2) of (x, y) coordinates, or 1-D array of flat
+            indices which is returned as it is.
+
+        Returns
+        -------
+        indices : numpy.ndarray
+            Flat indices of the cells.
+        inside : numpy.ndarray
+            Boolean mask of the cells that are in the array.
+
+        """
+        coord = numpy.asarray(coord)
+        if coord.ndim == 1 :
+            indices = coord.astype(numpy.intp, copy=False)
+            inside = (indices >= 0) & (indices < self._x*self._y)
+        elif coord.ndim == 2 and coord.shape[1] == 2 :
+            x = coord[:, 0].astype(numpy.intp)
+            y = coord[:, 1].astype(numpy.intp)
+            inside = (x >= 0) & (x < self._x) & (y >= 0) & (y < self._y)
+            indices = y*self._x + x
+        else :
+            raise ValueError("Coordinates must be (n, 2) or flat indices.")
+        return indices, inside
+    
     def set_values(self, coord, value):
         """
         Set the value of the cells whose coordinates are in the coord list to 
-        value.
+        value. Cells outside of the array are ignored.
 
         Parameters
         ----------
         coord : (List) list that contains the coordinates in the form of a 
         couple. For example : [(1,1),(3,5),...]
-        value : (Float) Value the cells will have.
+        It can also be a numpy array of shape (n, 2) of (x, y) coordinates 
+        or a 1-D numpy array of flat indices (y*x_size + x).
+        value : (Float) Value the cells will have, or (Array) one value per
+        cell for numpy coordinates.
 
         Returns
         -------
         None
         """
+        if isinstance(coord, numpy.ndarray) :
+            indices, inside = self.cell_indices(coord)
+            if numpy.ndim(value) != 0 :
+                value = numpy.asarray(value)[inside]
+            numpy.put(self.grid, indices[inside], value)
+            #The later cells win when a cell is given several times.
+            return
         x, y = [],[]
         for j,k in coord:
-            if j in range(self._x) and k in range(self._y) :
+            if 0 <= j < self._x and 0 <= k < self._y :
                 x.append(j)
                 y.append(k)
         self.grid[y, x] = value
@@ -111,16 +378,126 @@ class grid():
         ----------
         coord : tuple or list of tuples
             The tuple include the X and Y coordinates.
+            It can also be a numpy array of shape (n, 2) of (x, y) 
+            coordinates or a 1-D numpy array of flat indices.
 
         Returns
         -------
-        The value of the designated cell(s) as list.
+        The value of the designated cell(s) as list, or as a numpy array for
+        numpy coordinates.
 
         """
-        if type(coord) == list:
-            return [self.grid[y, x] for (x, y) in coord]
+        if isinstance(coord, numpy.ndarray) :
+            indices, inside = self.cell_indices(coord)
+            if not inside.all() :
+                raise IndexError("Some coordinates are not in the array")
+            return numpy.take(self.grid, indices)
         elif type(coord) == tuple:
             return [self.grid[coord[1], coord[0]]]
+        else :
+            return [self.grid[y, x] for (x, y) in coord]
+    
+    @staticmethod
+    @lru_cache(maxsize=32)
+    def neighbor_offsets(length=1, pattern='O'):
+        """
+        Give the (x, y) shifts from a cell to its neighbors. They are 
+        computed once per length and pattern and shared by all the grids.
+
+        Parameters
+        ----------
+        length : int
+            Cell range for the search.
+        pattern : chr
+            Search pattern : "O" for a square area, "+" for a cross area.
+
+        Returns
+        -------
+        tuple of tuple
+            The shifts, in the order of grid.get_neighbors : row by row 
+            for "O", and by increasing shift for "+" (West, North, East, 
+            South when length is 1).
+        """
+        if length < 1 :
+            raise ValueError("Incorrect length (must be >= 1)")
+        if pattern == 'O':
+            return tuple((j, k) for k in range(-length, length+1) \
+                         for j in range(-length, length+1) if (j, k) != (0, 0))
+        elif pattern == '+':
+            modulation_list = [k for k in range(-length, length+1) if k != 0]
+            return tuple(shift for k in modulation_list \
+                         for shift in [(k, 0), (0, k)])
+        raise ValueError("Unknown pattern.")
+    
+    neighbor_cache_bytes = 256*2**20
+    #Memory (bytes) the shared neighbor tables can take, the least recently
+    #used ones are dropped first. Larger tables are never kept.
+    _neighbor_tables = OrderedDict()
+    #(x, y, tor, length, pattern) : table, least recently used first.
+    
+    @staticmethod
+    def clear_neighbor_tables():
+        """
+        Empty the cache of the neighbor tables (see grid.neighbor_table).
+
+        Returns
+        -------
+        None.
+
+        """
+        grid._neighbor_tables.clear()
+    
+    @staticmethod
+    def neighbor_table(x, y, tor=False, length=1, pattern='O'):
+        """
+        Give the flat indices (y*x_size + x) of the neighbors of every cell 
+        of a grid shape. Tables are kept in a cache shared by all the grids,
+        bounded by grid.neighbor_cache_bytes, so grids of the same shape 
+        don't compute them again. It is emptied by 
+        grid.clear_neighbor_tables().
+
+        Parameters
+        ----------
+        x : int
+            X size of the grid.
+        y : int
+            Y size of the grid.
+        tor : bool
+            Consider the grid as a toroidal space.
+        length : int
+            Cell range for the search.
+        pattern : chr
+            Search pattern : "O" for a square area, "+" for a cross area.
+
+        Returns
+        -------
+        numpy.ndarray
+            Read-only array of shape (x*y, number of neighbors), row k holds
+            the neighbors of the cell of flat index k, -1 for the ones 
+            outside of a non toroidal grid.
+        """
+        key = (int(x), int(y), bool(tor), length, pattern)
+        tables = grid._neighbor_tables
+        if key in tables :
+            tables.move_to_end(key)
+            return tables[key]
+        offsets = numpy.array(grid.neighbor_offsets(length, pattern))
+        index_type = numpy.int32 if x*y < 2**31 else numpy.int64
+        ys, xs = numpy.divmod(numpy.arange(x*y, dtype=index_type), x)
+        nx = xs[:, None] + offsets[:, 0].astype(index_type)
+        ny = ys[:, None] + offsets[:, 1].astype(index_type)
+        if tor :
+            table = (ny % y)*x + nx % x
+        else :
+            table = numpy.where((nx >= 0) & (nx < x) & (ny >= 0) & (ny < y),\
+                                ny*x + nx, -1).astype(index_type)
+        table.flags.writeable = False
+        if table.nbytes <= grid.neighbor_cache_bytes :
+            tables[key] = table
+            while sum(kept.nbytes for kept in tables.values()) > \
+                grid.neighbor_cache_bytes :
+                tables.popitem(last=False)
+        return table
     
     def get_neighbors(self, coord, length=1, pattern='O'):
         """
@@ -137,33 +514,25 @@ class grid():
             
         Returns
         -------
-        List of neighbors coordinates. 
+        List of neighbors coordinates. With "+", the cells outside of the 
+        array are kept so there are always 4*length of them.
         """
-        try :
+        if self._neighbors_key == (length, pattern, False) and \
+            0 <= coord[0] < self._x and 0 <= coord[1] < self._y :
             return self.neighbors[coord]
-        except :
-            list_neigh = []
-            if length < 1 :
-                raise ValueError("Incorrect length (must be >= 1)")
-            if type(coord) != tuple and len(coord) != 2 :
-                raise ValueError("Something is wrong with the coordinates")
-            if coord[0] not in range(self._x) and \
-                coord[1] not in range(self._y):
-                raise ValueError("Some coordinates are not in the array")
-            if pattern == 'O':
-                for k in range(coord[1]-length, coord[1]+1+length):
-                    if k >= 0 and k < self._y :
-                        for j in range(coord[0]-length, coord[1]+1+length):
-                            if j >= 0 and j < self._x \
-                                and (k,j) != (coord[1],coord[0]) :
-                                list_neigh.append((j, k))
-            elif pattern == '+':
-                modulation_list = [k for k in range(-length, length+1)\
-                                   if k != 0]
-                for k in modulation_list:
-                    list_neigh.append((coord[0]+k,coord[1]))
-                    list_neigh.append((coord[0],coord[1]+k))
-            return list_neigh
+        #The table only holds the cells of the grid.
+        if type(coord) != tuple and len(coord) != 2 :
+            raise ValueError("Something is wrong with the coordinates")
+        if coord[0] not in range(self._x) and \
+            coord[1] not in range(self._y):
+            raise ValueError("Some coordinates are not in the array")
+        (x, y) = coord
+        list_neigh = [(x+j, y+k) for (j, k) in \
+                      grid.neighbor_offsets(length, pattern)]
+        if pattern == 'O':
+            list_neigh = [(j, k) for (j, k) in list_neigh \
+                          if 0 <= j < self._x and 0 <= k < self._y]
+        return list_neigh
     
     def get_neighbors_tor(self, coord, length=1, pattern='O'):
         """
@@ -183,27 +552,17 @@ class grid():
         -------
         List of neighbors coordinates. 
         """
-        try :
+        if self._neighbors_key == (length, pattern, True) and \
+            0 <= coord[0] < self._x and 0 <= coord[1] < self._y :
             return self.neighbors[coord]
-        except :
-            list_neigh = []
-            if length < 1 :
-                raise ValueError("Incorrect length (must be >= 1)")
-            if type(coord) != tuple and len(coord) != 2 :
-                raise ValueError("Something is wrong with the coordinates")
-            if coord[0] not in range(self._x) and coord[1] not in range(self._y):
-                raise ValueError("Some coordinates are not in the array")
-            if pattern == 'O':
-                for k in range(coord[1]-length, coord[1]+1+length):
-                    for j in range(coord[0]-length, coord[1]+1+length):
-                        if (k,j) != (coord[1],coord[0]) :
-                            list_neigh.append((j%self._x, k%self._y))
-            elif pattern == '+':
-                modulation_list = [k for k in range(-length, length+1) if k != 0]
-                for k in modulation_list:
-                    list_neigh.append(((coord[0]+k)%self._x, coord[1]%self._y))
-                    list_neigh.append((coord[0]%self._x, (coord[1]+k)%self._y))
-            return list_neigh
+        #The table only holds the cells of the grid.
+        if type(coord) != tuple and len(coord) != 2 :
+            raise ValueError("Something is wrong with the coordinates")
+        if coord[0] not in range(self._x) and coord[1] not in range(self._y):
+            raise ValueError("Some coordinates are not in the array")
+        (x, y) = coord
+        return [((x+j) % self._x, (y+k) % self._y) for (j, k) in \
+                grid.neighbor_offsets(length, pattern)]
         
     def show_neighbors(self, coord):
         """
@@ -237,26 +596,57 @@ class grid():
         -------
         None.
         """
-        self.saved[name] = self.grid.copy()
+        self.saved[name] = self.grid
+        #The store keeps a copy, or only the cells that differ from 
+        #"Original".
+        
+    def restore(self, name="Original"):
+        """
+        Set the current grid back to a saved one.
+
+        Parameters
+        ----------
+        name : str, optional
+            Name of the saved grid. The default is "Original".
+
+        Returns
+        -------
+        None.
+
+        """
+        self.grid = self.saved[name].copy()
         
     def coordinates(self):
         """
-        Generate all the coordinates of the grid and save them in a list called
-        "coord"
+        Give access to all the coordinates of the grid through "coord", a 
+        lazy sequence (see cell_range) : nothing is stored per cell.
 
         Returns
         -------
         None.
 
         """
-        self.coord = []
-        for k in range(self._x):
-            for j in range(self._y):
-                self.coord.append((k,j))
+        self.coord = cell_range(self)
+        
+    def indices(self):
+        """
+        Give the coordinates of all the cells as arrays, like numpy.indices.
+
+        Returns
+        -------
+        ys : numpy.ndarray
+            Y coordinate of each cell, shape (y, x).
+        xs : numpy.ndarray
+            X coordinate of each cell, shape (y, x).
+
+        """
+        return numpy.indices(self.grid.shape)
         
     def compute_neighbors(self, length=1, pattern = 'O'):
         """
-        Compute all the neighboring of all the cell of the array.
+        Compute all the neighboring of all the cell of the array. The table
+        is taken from the shared cache (see grid.neighbor_table) and 
+        self.neighbors gives the coordinates from it.
         
         Parameters
         ----------
@@ -271,16 +661,31 @@ class grid():
 
         """
         self._neighbors_length = length
-        self.neighbors = {}
-        if self._tor :
-            for coord in self.coord:
-                list_neigh = self.get_neighbors_tor(coord, length, pattern)
-                self.neighbors[coord] = list_neigh
-        else :
-            for coord in self.coord:
-                list_neigh = self.get_neighbors(coord, length, pattern)
-                self.neighbors[coord] = list_neigh
+        self._neighbor_table = grid.neighbor_table(self._x, self._y, \
+                                                   bool(self._tor), length, \
+                                                   pattern)
+        self.neighbors = neighborhood(self._neighbor_table, self._x, \
+            self._y, grid.neighbor_offsets(length, pattern), pattern == '+')
+        self._neighbors_key = (length, pattern, bool(self._tor))
                 
+    def pyplot(self):
+        """
+        Import matplotlib.pyplot and create the figure of the grid the first
+        time it is needed, so grids that are never displayed don't pay for 
+        it.
+
+        Returns
+        -------
+        The matplotlib.pyplot module.
+
+        """
+        import matplotlib.pyplot as plt
+        if self.fig is None :
+            self.fig, self.ax = plt.subplots(figsize=(16, 16))
+        else :
+            plt.figure(self.fig.number)
+        return plt
+        
     def display(self, grid_id="Current", colors="bone"):
         """
         Show the array as a graph.
@@ -298,6 +703,7 @@ class grid():
         None.
 
         """
+        plt = self.pyplot()
         if grid_id == "Current" :
             plt.imshow(self.grid, cmap=colors, interpolation='nearest')
             plt.axis('off')
@@ -314,7 +720,8 @@ class grid():
         
     def save_fig(self, name):
         """
-        Save the current grid as an image.
+        Save the current grid as an image of the pyplot figure. See 
+        save_image for a faster output without figure.
 
         Parameters
         ----------
@@ -327,60 +734,376 @@ class grid():
 
         """
         self.display()
-        plt.savefig(name, dpi=200)
+        self.pyplot().savefig(name, dpi=200)
+        
+    @staticmethod
+    @lru_cache(maxsize=16)
+    def colormap(colors="bone", levels=256):
+        """
+        Lookup table of a matplotlib colormap, only matplotlib.colormaps is
+        imported (no pyplot). The table is shared, hence read-only.
+
+        Parameters
+        ----------
+        colors : str, optional
+            Color palette. The default is "bone".
+        levels : int, optional
+            Number of colors. The default is 256.
+
+        Returns
+        -------
+        numpy.ndarray
+            RGB colors (levels, 3) as uint8.
+
+        """
+        from matplotlib import colormaps
+        table = colormaps[colors](numpy.linspace(0, 1, levels))[:, :3]
+        table = (table*255).astype(numpy.uint8)
+        table.flags.writeable = False
+        return table
+        
+    def to_rgb(self, grid_id="Current", colors="bone", factor=1):
+        """
+        Map a grid to an RGB image through a colormap lookup table, the 
+        values being scaled between their minimum and maximum like 
+        display does.
+
+        Parameters
+        ----------
+        grid_id : str, optional
+            Name of the grid in self.saved, "Current" for the current grid.
+            The default is "Current".
+        colors : str, optional
+            Color palette. The default is "bone".
+        factor : int, optional
+            Upscaling factor, each cell becomes factor*factor pixels.
+            The default is 1.
+
+        Returns
+        -------
+        numpy.ndarray
+            Image (y*factor, x*factor, 3) as uint8.
+
+        """
+        array = self.grid if grid_id == "Current" else self.saved[grid_id]
+        levels = grid.to_levels(array)
+        if factor != 1 :
+            levels = grid.upscale(levels, factor)
+        return grid.colormap(colors)[levels]
+        
+    @staticmethod
+    def to_levels(array, low=None, high=None, levels=256):
+        """
+        Index in a colormap table of each value, the values being scaled
+        linearly between low and high.
+
+        Parameters
+        ----------
+        array : numpy.ndarray
+            Values.
+        low : float, optional
+            Value of the first color. The default is None (array minimum).
+        high : float, optional
+            Value of the last color. The default is None (array maximum).
+        levels : int, optional
+            Number of colors (at most 256). The default is 256.
+
+        Returns
+        -------
+        numpy.ndarray
+            Indices as uint8, same shape as the array.
+
+        """
+        array = numpy.asarray(array)
+        low = array.min() if low is None else low
+        high = array.max() if high is None else high
+        if high <= low :
+            return numpy.zeros(array.shape, dtype=numpy.uint8)
+        return numpy.clip((array-low)*(levels/(high-low)), 0, levels-1)\
+            .astype(numpy.uint8)
+        
+    @staticmethod
+    def write_png(file, image, level=6):
+        """
+        Write an RGB image as a PNG file, without matplotlib.
+
+        Parameters
+        ----------
+        file : str
+            Path of the output file.
+        image : numpy.ndarray
+            Image (height, width, 3) as uint8.
+        level : int, optional
+            zlib compression level (0-9). The default is 6.
+
+        Returns
+        -------
+        None.
+
+        """
+        image = numpy.asarray(image, dtype=numpy.uint8)
+        (height, width) = image.shape[:2]
+        rows = numpy.zeros((height, width*3+1), dtype=numpy.uint8)
+        rows[:, 1:] = image.reshape(height, width*3)
+        #Each row starts with its filter type, 0 (none).
+        def chunk(kind, data):
+            return struct.pack(">I", len(data))+kind+data+\
+                struct.pack(">I", zlib.crc32(kind+data))
+        with open(file, "wb") as output :
+            output.write(b"\x89PNG\r\n\x1a\n")
+            output.write(chunk(b"IHDR", struct.pack(">IIBBBBB", width, \
+                                                   height, 8, 2, 0, 0, 0)))
+            output.write(chunk(b"IDAT", zlib.compress(rows.tobytes(), level)))
+            output.write(chunk(b"IEND", b""))
         
-    def upscale(array, factor=3):
+    def save_image(self, file, grid_id="Current", colors="bone", factor=1, \
+                   level=6):
         """
-        Upscale the array by the factor.
+        Save a grid as a PNG image at its native resolution (or upscaled),
+        without going through a pyplot figure.
 
         Parameters
         ----------
+        file : str
+            Path of the output file.
+        grid_id : str, optional
+            Name of the grid in self.saved, "Current" for the current grid.
+            The default is "Current".
+        colors : str, optional
+            Color palette. The default is "bone".
+        factor : int, optional
+            Upscaling factor. The default is 1.
+        level : int, optional
+            zlib compression level (0-9). The default is 6.
+
+        Returns
+        -------
+        None.
+
+        """
+        grid.write_png(file, self.to_rgb(grid_id, colors, factor), level)
+        
+    @staticmethod
+    def upscale(array, factor=3, out=None):
+        """
+        Upscale the array by the factor : each cell becomes a block of 
+        factor*factor cells with the same value.
+
+        Parameters
+        ----------
+        array : numpy.ndarray
+            Array to upscale, for example a grid from self.saved.
         factor : Int, optional
             Upscaling factor. The default is 3.
+        out : numpy.ndarray, optional
+            Array of shape (y*factor, x*factor) the result is written into.
+            The default is None (a new array is created).
 
         Returns
         -------
         The upscaled array.
 
         """
-        upscaled = numpy.zeros([array.shape[0]*factor, array.shape[1]*factor])
-        for y in range(array.shape[0]):
-            for x in range(array.shape[1]):
-                if array[y, x] == 1 :
-                    new_y, new_x, offset = y*factor, x*factor, int(factor/2)
-                    coord_y = [k for k in range(new_y-offset, new_y+offset+1) \
-                               if k >= 0 and k <= upscaled.shape[1]]
-                    coord_x = [k for k in range(new_x-offset, new_x+offset+1) \
-                               if k >= 0 and k <= upscaled.shape[0]]
-                    for k in coord_y :
-                        for j in coord_x :
-                            upscaled[k, j] = 1
-        return upscaled
+        array = numpy.asarray(array)
+        shape = (array.shape[0]*factor, array.shape[1]*factor)
+        if out is None :
+            out = numpy.empty(shape, dtype=array.dtype)
+        elif out.shape != shape :
+            raise ValueError("The output array must have a shape of {}."\
+                             .format(shape))
+        if out.flags.c_contiguous :
+            out.reshape(array.shape[0], factor, array.shape[1], factor)[...] \
+                = array[:, None, :, None]
+            #Each cell is broadcast over its block.
+        else :
+            for k in range(factor):
+                for j in range(factor):
+                    out[k::factor, j::factor] = array
+        return out
     
-    def export(self, name):
+    def export(self, name="Original", file=None):
         """
-        Export the grid with the given name from the self.mazed dict in a 
+        Export the grid with the given name from the self.saved dict in a 
         .txt file.
 
         Parameters
         ----------
-        name : str
-            Name of the grid in the self.saved dict.
+        name : str, optional
+            Name of the grid in the self.saved dict. The default is 
+            "Original".
+        file : str, optional
+            Path of the output file. The default is None, which names it 
+            after the current date.
 
         Returns
         -------
         None.
 
         """
-        file = open("Maze_export_{}.txt".format(str(\
-               datetime.now().strftime("%d-%m-%Y_%H-%M-%S"))), "a")
-        maze_as_list = self.saved["Original"].tolist()
+        if file is None :
+            file = "Maze_export_{}.txt".format(str(\
+                   datetime.now().strftime("%d-%m-%Y_%H-%M-%S")))
+        file = open(file, "w")
+        maze_as_list = self.saved[name].tolist()
         for raw_row in maze_as_list :
             raw_row = [str(int(k)) for k in raw_row]
             row = "".join(raw_row)
             file.write(row+'\n')
         file.close()
         
+    def to_bytes(self, name="Original", layout=None):
+        """
+        Encode a grid in the binary format.
+
+        Parameters
+        ----------
+        name : str, optional
+            Name of the grid in the self.saved dict, "Current" for the 
+            current grid. The default is "Original".
+        layout : str, optional
+            "packed" or "raw". The default is None, which packs the grids 
+            made of walls (0), paths (1), one start (2) and one exit (3).
+
+        Returns
+        -------
+        bytes
+
+        """
+        array = self.grid if name == "Current" else self.saved[name]
+        markers, packable = [], numpy.isin(array, [0, 1, 2, 3]).all()
+        for value in [2, 3]:
+            found = numpy.argwhere(array.T == value)
+            markers.append(tuple(found[0].tolist()) if len(found) == 1 \
+                           else (-1, -1))
+            packable = packable and len(found) <= 1
+            #The start and exit are stored in the header so there must be 
+            #at most one of each.
+        if layout is None :
+            layout = "packed" if packable else "raw"
+        if layout == "packed" :
+            data = numpy.packbits(array != 0, axis=1).tobytes()
+        elif layout == "raw" :
+            data = numpy.ascontiguousarray(array).tobytes()
+        else :
+            raise ValueError("Unknown layout.")
+        header = grid.binary_header.pack(grid.binary_magic, 1, \
+                    grid.binary_layouts.index(layout), \
+                    array.dtype.str.encode(), array.shape[1], array.shape[0], \
+                    *markers[0], *markers[1])
+        return header+data
+        
+    def export_binary(self, name="Original", file=None, layout=None):
+        """
+        Export a grid in the binary format : a small header (size, start, 
+        exit, dtype) followed by the cells, one bit per cell when the grid 
+        only has walls and paths.
+
+        Parameters
+        ----------
+        name : str, optional
+            Name of the grid in the self.saved dict, "Current" for the 
+            current grid. The default is "Original".
+        file : str, optional
+            Path of the output file. The default is None, which names it 
+            after the current date.
+        layout : str, optional
+            "packed" or "raw". The default is None (see grid.to_bytes).
+
+        Returns
+        -------
+        None.
+
+        """
+        if file is None :
+            file = "Maze_export_{}.maze".format(str(\
+                   datetime.now().strftime("%d-%m-%Y_%H-%M-%S")))
+        with open(file, "wb") as output :
+            output.write(self.to_bytes(name, layout))
+        
+
+class cell_range(Sequence):
+    """
+    Lazy sequence of the (x, y) coordinates of all the cells of a grid, in
+    the x then y order : (0, 0), (0, 1), ... It follows the size of the grid
+    and computes the coordinates on demand.
+    """
+    
+    def __init__(self, grid):
+        self._grid = grid
+        
+    def __len__(self):
+        return self._grid._x*self._grid._y
+    
+    def __getitem__(self, index):
+        if isinstance(index, slice) :
+            return [self[k] for k in range(*index.indices(len(self)))]
+        if index < 0 :
+            index += len(self)
+        if not 0 <= index < len(self) :
+            raise IndexError("cell_range index out of range")
+        return divmod(index, self._grid._y)
+    
+    def __iter__(self):
+        for x in range(self._grid._x):
+            for y in range(self._grid._y):
+                yield (x, y)
+                
+    def __contains__(self, coord):
+        try :
+            (x, y) = coord
+        except (TypeError, ValueError) :
+            return False
+        return 0 <= x < self._grid._x and 0 <= y < self._grid._y
+    
+    def array(self):
+        """
+        Give the coordinates as an array, in the same order.
+
+        Returns
+        -------
+        numpy.ndarray
+            Array of shape (x*y, 2) of the (x, y) coordinates.
+
+        """
+        xs, ys = numpy.divmod(numpy.arange(len(self)), self._grid._y)
+        return numpy.stack([xs, ys], axis=1)
+
+
+class neighborhood(Mapping):
+    """
+    Read-only dict-like view of a neighbor table : keys are the coordinates
+    of the cells and values the list of the coordinates of their neighbors,
+    the same as grid.get_neighbors gives.
+    """
+    
+    def __init__(self, table, x, y, offsets, outside=False):
+        self._table = table
+        self._x = x
+        self._y = y
+        self._offsets = offsets
+        self._outside = outside
+        #Keep the cells outside of the grid (-1 in the table), as 
+        #get_neighbors does for "+".
+        
+    def __getitem__(self, coord):
+        (x, y) = coord
+        if not (0 <= x < self._x and 0 <= y < self._y) :
+            raise KeyError(coord)
+        if self._outside :
+            return [(k % self._x, k // self._x) if k >= 0 else (x+j, y+l) \
+                    for k, (j, l) in zip(self._table[y*self._x + x].tolist(),\
+                                         self._offsets)]
+        return [(k % self._x, k // self._x) for k in \
+                self._table[y*self._x + x].tolist() if k >= 0]
+    
+    def __iter__(self):
+        for x in range(self._x):
+            for y in range(self._y):
+                yield (x, y)
+                
+    def __len__(self):
+        return self._x*self._y
+        
         
 if __name__ == "__main__":
     t = grid(10, 5)
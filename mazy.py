@@ -9,14 +9,35 @@ Created on Sun Mar 20 18:24:35 2022
 """
 
 from grid import grid
-from random import shuffle, randrange
+from frontier import frontier
+from streamer import streamer
+import multiprocessing
+import random
 from math import sqrt
+from heapq import heappush, heappop
+import numpy
 import time
 
 class mazy():
+    
+    frontier_workmen = {"IPR": "random", "IDD": "stack", "IBE": "ends", \
+                        "IGT": "tree"}
+    #Workmen that pick their primers through a frontier object in constant 
+    #time : IPR (I Pick Randomly) behaves like IDE, IDD (I Dig Deep) always 
+    #continues from the newest cell, IBE (I take Both Ends) behaves like IGS 
+    #and IGT (I Grow a Tree) mixes IDD and IPR.
+    
+    solvers = ["IAS", "IMM", "IFD"]
+    #Runners that compute the whole path at once : IAS (I use A Star), 
+    #IMM (I Meet in the Middle, bidirectional breadth-first search) and IFD 
+    #(I Fill the Deadends).
+    
+    direction_bits = numpy.array([1, 2, 4, 8], dtype=numpy.uint8)
+    #Bits of the West, North, East and South directions in mazy.path_dirs.
 
     def __init__(self, x=31, y=21, workman="IDE", tor=False, GUI=False,\
-                 file=""):
+                 file="", headless=False, probe=None, analyse=True, \
+                 seed=None, cache=None, tile=(128, 128), processes=None):
         """
         The mazy class provide algorithms to create and resolve a maze.
 
@@ -28,10 +49,40 @@ class mazy():
             Y size of the maze. The default is 21.
         workman : str, optional
             Change the mode of drilling of the maze. The default is "IDE".
+            Parameters : "IDE", "IGS", "IPR", "IDD", "IBE", "IGT", "ISR" 
+            (I Stream Rows, uneven sizes only), "tiler" (uneven sizes only),
+            "gateman"
         tor : bool, optional
             Set the maze as a toroidal space or not. The default is False.
         GUI : bool, optional
             Allow the customization of the maze through a simple GUI.
+        file : str, optional
+            Path of a maze file to import instead of building a new maze.
+        headless : bool, optional
+            Never display the maze, so matplotlib isn't imported and no 
+            figure is created. The default is False.
+        probe : probe, optional
+            Collector (see probe.probe) the build and the runners report 
+            their timings and counters into. The default is None (nothing is
+            collected).
+        analyse : bool, optional
+            Compute the adjacency and the distances once the maze is carved.
+            Without it the maze can't be solved. The default is True.
+        seed : int, optional
+            Seed of the maze and of the runners, the same seed gives the 
+            same maze and journeys. The default is None (the global random 
+            states).
+        cache : str or cache, optional
+            Directory (or cache.cache object) where seeded mazes are stored 
+            with their adjacency and distances, so they are loaded instead 
+            of built the next time. The default is None.
+        tile : tuple, optional
+            Size of a tile in cells (x, y) for the "tiler" workman. 
+            The default is (128, 128).
+        processes : int, optional
+            Number of worker processes of the "tiler" workman. The default 
+            is None : one per CPU, or 1 when the maze is already built in a 
+            worker process.
         
         Returns
         -------
@@ -42,7 +93,7 @@ class mazy():
             self._y = int(input("Y dimension (uneven only) : "))
             self._x = int(input("X dimension (uneven only) : "))
             self._tor = bool(int(input("Is the maze toroidal ? (1 or 0) ")))
-            self._workman = input("Workman (IDE or IGS): ")
+            self._workman = input("Workman (IDE, IGS, IPR, IDD, IBE or IGT): ")
         else :
             self._y = y
             self._x = x
@@ -50,15 +101,104 @@ class mazy():
             self._workman = workman
         
         self._file = file    
-        self.drilled = []
-        self.path_neighbors = {}
+        self._headless = headless
+        self.probe = probe
+        self._analyse = analyse
+        self.path_dirs = None
+        self.path_offsets = None
+        self.path_indices = None
+        self._path_neighbors = None
         self.runner_path = {}
+        self.seed = seed
+        self.random = random if seed is None else random.Random(seed)
+        self.rng = numpy.random if seed is None else \
+            numpy.random.default_rng(seed)
+        #Random generators, the global ones when there is no seed.
+        self._cache = cache
+        self._tile = tuple(tile)
+        self._processes = processes
                     
         self.maze = grid(self._x, self._y, tor=self._tor, value=0, \
                          file=self._file)
+        self.carved = numpy.zeros(self.maze.grid.shape, dtype=bool)
+        #Boolean mask with the same shape as the grid, True for path cells.
+        self._drilled = None
+        #Cache of the drilled list, rebuilt from carved only when needed.
             
         self.maze_builder()
 
+    @property
+    def drilled(self):
+        """
+        List of the coordinates of the path cells. It is materialized from 
+        the carved mask the first time it is needed and cached until the 
+        mask changes.
+
+        Returns
+        -------
+        list of tuple
+            Coordinates (x, y) of the path cells.
+
+        """
+        if self._drilled is None :
+            xs, ys = numpy.nonzero(self.carved.T)
+            self._drilled = list(zip(xs.tolist(), ys.tolist()))
+        return self._drilled
+    
+    @property
+    def path_neighbors(self):
+        """
+        Dictionnary containing, for each path cell, the neighboring cells 
+        that are also path cells. It is materialized from the adjacency 
+        arrays the first time it is needed.
+
+        Returns
+        -------
+        dict
+            Keys are the coordinates (x, y) and values are a list of tuple.
+
+        """
+        if self._path_neighbors is None :
+            self._path_neighbors = {k: self.get_path_neighbors(k) \
+                                    for k in self.drilled}
+        return self._path_neighbors
+    
+    def carve(self, coord_list):
+        """
+        Mark the given cells as path cells in the carved mask.
+
+        Parameters
+        ----------
+        coord_list : list of tuple
+            Coordinates (x, y) of the cells.
+
+        Returns
+        -------
+        None.
+
+        """
+        for (x, y) in coord_list :
+            self.carved[y, x] = True
+        self._drilled = None
+        
+    def is_drillable(self, coord):
+        """
+        Check whether the given cell is in the maze and not carved yet.
+
+        Parameters
+        ----------
+        coord : tuple
+            Coordinates (x, y) of the cell.
+
+        Returns
+        -------
+        bool
+
+        """
+        x, y = coord
+        return 0 <= x < self._x and 0 <= y < self._y \
+            and not self.carved[y, x]
+
     def drill(self, position, middle_point, next_point):
         """
         Set the values of the given cells to 1 which is the value of a 
@@ -88,22 +228,23 @@ class mazy():
         
     def drillerman_core(self, workman, primers):
         if workman == "IDE":
-            shuffle(primers)
+            self.random.shuffle(primers)
             (px, py) = primers.pop()
         elif workman == "IGS":
             if len(primers) >= 2:
-                (px, py) = primers.pop(-randrange(0,2))
+                (px, py) = primers.pop(-self.random.randrange(0,2))
             else :
                 (px, py) = primers.pop()
+        else :
+            (px, py) = primers.pop()
+            #The frontier object picks the primer according to its mode.
         #A random primer or starter is chosen.
-        options = [(x, y) for (x, y) in \
+        options = [coord for coord in \
                    [(px-2, py), (px, py+2), (px+2, py), (px, py-2)] \
-                       if x in range(self._x) \
-                           and y in range(self._y) \
-                               and (x, y) not in self.drilled]
+                       if self.is_drillable(coord)]
         #That list contains the neighboring cells coordinates that the
         #drillerman can drill.
-        shuffle(options)
+        self.random.shuffle(options)
         return px, py, options        
     
     def drillerman(self):
@@ -115,16 +256,33 @@ class mazy():
         None.
 
         """
-        primers = [self.start_point]
+        start_time = time.perf_counter()
+        timed = self.probe is not None
+        selection_time, peak, carves, backtracks = 0, 0, 0, 0
+        #Instrumentation, only updated when there is a probe.
+        if self._workman in mazy.frontier_workmen :
+            primers = frontier(mazy.frontier_workmen[self._workman], \
+                               cells=[self.start_point], \
+                               generator=self.random)
+        else :
+            primers = [self.start_point]
         #List that save the coordinates of the paths that the drillerman can take.
         #For example, at each cell, the drillerman can go one direction and the 
         #others are added to that list to come back at them later.  
-        self.drilled = [self.start_point]
-        #List that save the cell that are now "path".
+        self.carve([self.start_point])
+        #Mask that save the cell that are now "path".
         while len(primers) != 0:
-            px, py, options = self.drillerman_core(self._workman, primers)
+            if timed :
+                peak = max(peak, len(primers))
+                selection_start = time.perf_counter()
+                px, py, options = self.drillerman_core(self._workman, primers)
+                selection_time += time.perf_counter()-selection_start
+            else :
+                px, py, options = self.drillerman_core(self._workman, primers)
             options_count = len(options)
-            if options_count >= 1 :
+            if options_count == 0 :
+                backtracks += 1
+            else :
                 #We make sure there are options available for our drillerman.
                 #Else it's a deadend so we lookback to choose another primer.
                 next_p = options.pop()
@@ -133,55 +291,167 @@ class mazy():
                 #Coordinates between the current position and the destination.
                 self.drill((px, py), mid_p, next_p)
                 #We drill the cells. 
-                self.drilled.append(next_p)
-                self.drilled.append(mid_p)
-                #The drilled cells are added to the "drilled" list.
+                self.carved[next_p[1], next_p[0]] = True
+                self.carved[mid_p[1], mid_p[0]] = True
+                #The drilled cells are marked in the "carved" mask.
+                carves += 1
                 if next_p != self.exit_point:
                     if options_count == 1:
-                        primers += [next_p]
+                        primers.extend([next_p])
                     else :
-                        primers += [(px, py), next_p]
+                        primers.extend([(px, py), next_p])
                 #We add the coordinates of the cell that the 
                 #drillerman could continue from.
-        #We finally add all drilled cell to "drilled".
-        for coord in self.maze.coord :
-            if self.maze.get_values(coord)[0] == 1 \
-                and coord not in self.drilled:
-                self.drilled.append(coord)
+        #We finally mark all path cell in "carved".
+        self.carved |= self.maze.grid != 0
+        self._drilled = None
         #We save the maze in order to use it later.        
         self.maze.save(name="Original")
+        if timed :
+            self.probe.add_time("carve", time.perf_counter()-start_time)
+            self.probe.add_time("frontier selection", selection_time)
+            self.probe.count("cells carved", 2*carves+1)
+            self.probe.count("backtracks", backtracks)
+            self.probe.peak("frontier size", peak)
         
     def gateman(self, percentage):
-        raw_doors = [cell for cell in self.maze.coord \
-                 if (cell[0]%2 + cell[1]%2) == 1]
-        borders = [cell for cell in self.maze.coord \
-                   if cell[0] == 0 or cell[0] == self._x-1 \
-                   or cell[1] == 0 or cell[1] == self._y-1 ]
-        doors = [cell for cell in raw_doors \
-                      if cell not in borders]
-        lanes = [cell for cell in self.maze.coord \
-                 if cell[0]%2 != 0 and cell[1]%2 != 0]
-        self.maze.set_values(lanes, 1)
-        shuffle(doors)
-        open_doors = [cell for cell in doors[:int(len(doors)*percentage/100)]]
-        self.maze.set_values(open_doors, 1)
-        for x in range(self._x):
-            for y in range(self._y):
-                if self.maze.get_values((x,y))[0] != 0 :
-                    self.drilled.append((x, y))
-        print(self.drilled)
+        """
+        gateman is the algorithm that create a braided maze : every lane cell
+        (odd coordinates) is a path and a random part of the doors between 
+        them is opened. Everything is done on whole arrays.
+
+        Parameters
+        ----------
+        percentage : float
+            Percentage of the doors that are opened.
+
+        Returns
+        -------
+        None.
+
+        """
+        start_time = time.perf_counter()
+        lanes = numpy.zeros(self.maze.grid.shape, dtype=bool)
+        lanes[1::2, 1::2] = True
+        #Lanes are the cells with both coordinates uneven.
+        doors = numpy.zeros(self.maze.grid.shape, dtype=bool)
+        doors[1::2, 0::2] = True
+        doors[0::2, 1::2] = True
+        doors[[0, -1], :] = False
+        doors[:, [0, -1]] = False
+        #Doors are the cells with only one uneven coordinate, borders 
+        #excluded.
+        doors_index = numpy.flatnonzero(doors)
+        open_doors = self.rng.permutation(doors_index)[\
+                                    :int(len(doors_index)*percentage/100)]
+        #A random part of the doors is chosen in one go.
+        opened = lanes.copy()
+        opened.ravel()[open_doors] = True
+        self.maze.grid[opened & (self.maze.grid == 0)] = 1
+        #The start and exit cells keep their values.
+        self.carved = self.maze.grid != 0
+        self._drilled = None
         self.maze.save(name="Original")     
+        if self.probe is not None :
+            self.probe.add_time("carve", time.perf_counter()-start_time)
+            self.probe.count("cells carved", \
+                             int(numpy.count_nonzero(self.carved)))
+        
+    def streamerman(self):
+        """
+        streamerman creates a perfect maze row by row with the streamer 
+        (Eller's algorithm), each row being copied in the grid as soon as it
+        is generated. To build mazes larger than memory, use the streamer 
+        directly with an output file.
+
+        Returns
+        -------
+        None.
+
+        """
+        start_time = time.perf_counter()
+        def fill(index, row):
+            self.maze.grid[index] = row
+        streamer(self._x, self._y, callback=fill, \
+                 seed=self.spawn_seed()).run()
+        self.carved = self.maze.grid != 0
+        self._drilled = None
+        self.maze.save(name="Original")
+        if self.probe is not None :
+            self.probe.add_time("carve", time.perf_counter()-start_time)
+            self.probe.count("cells carved", \
+                             int(numpy.count_nonzero(self.carved)))
+        
+    def tilerman(self, tile=(128, 128), workman="IPR", processes=None):
+        """
+        tilerman creates the maze with the tiler : tiles are carved in 
+        parallel by drillerman then joined into a perfect maze.
+
+        Parameters
+        ----------
+        tile : tuple, optional
+            Size of a tile in cells (x, y). The default is (128, 128).
+        workman : str, optional
+            Workman carving the tiles. The default is "IPR".
+        processes : int, optional
+            Number of worker processes. The default is None : one per CPU,
+            or 1 in a worker process so pools aren't nested.
+
+        Returns
+        -------
+        None.
+
+        """
+        from tiler import tiler
+        #Imported here as the tiler itself uses mazy to carve the tiles.
+        start_time = time.perf_counter()
+        if processes is None and \
+            multiprocessing.parent_process() is not None :
+            processes = 1
+            #Already in a worker process (service, batch), no nested pool.
+        self.maze.grid[...] = tiler(self._x, self._y, tile, workman, \
+                                    processes=processes, \
+                                    seed=self.spawn_seed()).run()
+        self.carved = self.maze.grid != 0
+        self._drilled = None
+        self.maze.save(name="Original")
+        if self.probe is not None :
+            self.probe.add_time("carve", time.perf_counter()-start_time)
+            self.probe.count("cells carved", \
+                             int(numpy.count_nonzero(self.carved)))
+        
+    def spawn_seed(self):
+        """
+        Give a seed for a generator used by the maze (streamer, tiler).
+
+        Returns
+        -------
+        int or None
+            None when the maze has no seed.
+
+        """
+        return None if self.seed is None else self.random.randrange(2**32)
         
     def supervisor(self, mode="IDE"):
-        if mode in ["IDE","IGS"]:
+        if mode in ["IDE","IGS"] or mode in mazy.frontier_workmen:
             self.drillerman()
         if mode == "gateman":
             self.gateman(50)               
+        if mode == "ISR":
+            self.streamerman()
+        if mode == "tiler":
+            self.tilerman(self._tile, processes=self._processes)
                 
     def compute_path_neighbors(self):
         """
-        Method to generate a dictionnary (self.path_neighbors) containing, 
-        for each path cell, all neighboring cells that are also path cell. 
+        Method to generate the adjacency of the path cells by comparing the 
+        carved mask with its shifted copies. It is stored as :
+        - self.path_dirs : 4-bit mask per cell of the directions leading to 
+        another path cell (1 West, 2 North, 4 East, 8 South).
+        - self.path_offsets and self.path_indices : flat indices of the 
+        neighbors of the cell k are 
+        path_indices[path_offsets[k]:path_offsets[k+1]], 
+        in the West, North, East, South order.
         Used to speed up process.
 
         Returns
@@ -189,55 +459,118 @@ class mazy():
         None.
 
         """
-        for k in self.drilled:
-            neighbors = [coord for coord in \
-                         self.maze.get_neighbors(k, pattern="+")\
-                         if coord in self.drilled]
-            self.path_neighbors[k] = neighbors
-            #keys are the coordinates (x, y) and values are a list of tuple.
+        start_time = time.perf_counter()
+        carved = self.carved
+        x_size = carved.shape[1]
+        dirs = numpy.zeros(carved.shape, dtype=numpy.uint8)
+        horizontal = carved[:, 1:] & carved[:, :-1]
+        vertical = carved[1:, :] & carved[:-1, :]
+        #Pairs of path cells next to each other.
+        dirs[:, 1:] |= horizontal.view(numpy.uint8)
+        dirs[1:, :] |= vertical.view(numpy.uint8) << 1
+        dirs[:, :-1] |= horizontal.view(numpy.uint8) << 2
+        dirs[:-1, :] |= vertical.view(numpy.uint8) << 3
+        self.path_dirs = dirs
+        
+        flat_dirs = dirs.ravel()
+        index_type = numpy.int32 if carved.size < 2**31 else numpy.int64
+        counts = numpy.zeros(carved.size+1, dtype=index_type)
+        for bit in mazy.direction_bits :
+            counts[1:] += (flat_dirs & bit) != 0
+        self.path_offsets = numpy.cumsum(counts, dtype=index_type)
+        #Number of path neighbors of each cell, accumulated.
+        cells = numpy.flatnonzero(flat_dirs).astype(index_type)
+        candidates = cells[:, None] + numpy.array([-1, -x_size, 1, x_size], \
+                                                  dtype=index_type)
+        linked = (flat_dirs[cells][:, None] & mazy.direction_bits) != 0
+        self.path_indices = candidates[linked]
+        #Row by row, each cell gets its neighbors in the W, N, E, S order.
+        self._path_neighbors = None
+        if self.probe is not None :
+            self.probe.add_time("adjacency", time.perf_counter()-start_time)
+        
+    def get_path_neighbors(self, coord):
+        """
+        Give the neighboring cells of a path cell that are also path cells.
+
+        Parameters
+        ----------
+        coord : tuple
+            Coordinates (x, y) of the cell.
+
+        Returns
+        -------
+        list of tuple
+            Coordinates of the neighboring path cells.
+
+        """
+        x_size = self.carved.shape[1]
+        index = coord[1]*x_size + coord[0]
+        neighbors = self.path_indices[self.path_offsets[index]:\
+                                      self.path_offsets[index+1]]
+        return [(k % x_size, k // x_size) for k in neighbors.tolist()]
     
     def maze_coloration(self):
         """
         Method to color the maze. The color scale represent the distance to
         the exit point. The brighter the color is, the farthest the cell is.
-        The colored maze is saved as "Distance" in self.maze.saved.
+        The distances are computed with a breadth-first search that process
+        the whole frontier at once.
+        The colored maze is saved as "Distance" in self.maze.saved. Path cells
+        that can't reach the exit are set to -1.
         
         Returns
         -------
         None.
 
         """
-        colored = [self.exit_point]
-        #Colored is a list which save the cell that are already colored.
-        primers = colored.copy()
-        #Primers as the same function as in the drillerman method.
-        while len(self.drilled) != len(colored) :
-            #The coloration continue as long as all drilled (or path) cell 
-            #aren't colored.
-            position = primers.pop()
-            neighbors = [coord for coord in self.path_neighbors[position] \
-                         if coord not in colored]
-            #Neighbors stores the neighboring cells that are not colored.
-            self.maze.set_values(neighbors, \
-                                 self.maze.get_values(position)[0]+1)
-            #The value of those neighbors cell is set as the value of the 
-            #current cell + 1.
-            primers += neighbors
-            colored += neighbors
-            #Neighbors are added to the primers list to continue 
-            #the coloration to their neighbors and so on. They're also added
-            #to the colored list in order not to reprocess them.
-        self.maze.save(name="Distance")
-        #The colored maze is saved as "Distance" in self.maze.saved.
-        self.start_distance = int(self.maze.get_values(self.start_point)[0])
-        #The value of the start_point is saved as it is a quality index.
-        self.maze.set_values([self.exit_point, self.start_point], \
-                        max(self.maze.get_values(self.maze.coord))+10)
-        #The cell value of start_point and exit_point are replaced with the 
-        #maximum value of the maze's cells +10 to better see them in the graph.
-        self.maze.grid = self.maze.saved["Original"].copy()
-        #The maze grid is set back to the clean and original maze in order to 
-        #continue working with it.
+        start_time = time.perf_counter()
+        x_size = self.carved.shape[1]
+        flat_dirs = self.path_dirs.ravel()
+        deltas = [-1, -x_size, 1, x_size]
+        #Flat index shift of the West, North, East and South directions.
+        distance = numpy.full(self.carved.size, -1, dtype=numpy.int64)
+        #Distance of each cell to the exit point, -1 if not reached (yet).
+        exit_index = self.exit_point[1]*x_size + self.exit_point[0]
+        distance[exit_index] = 0
+        primers = numpy.array([exit_index])
+        #Primers are the cells reached at the previous step.
+        step = 0
+        while len(primers) != 0 :
+            step += 1
+            neighbors = numpy.concatenate([
+                primers[(flat_dirs[primers] & bit) != 0] + delta \
+                for bit, delta in zip(mazy.direction_bits.tolist(), deltas)])
+            #All the path cells next to the primers.
+            neighbors = numpy.unique(neighbors[distance[neighbors] == -1])
+            #Only the cells that aren't colored yet are kept.
+            distance[neighbors] = step
+            primers = neighbors
+        distance = distance.reshape(self.carved.shape)
+        colored = self.maze.grid.copy()
+        exit_value = colored[self.exit_point[1], self.exit_point[0]]
+        reached = distance >= 0
+        colored[reached] = exit_value + distance[reached]
+        #The value of a cell is the value of the exit + its distance.
+        unreachable = self.carved & ~reached
+        colored[unreachable] = -1
+        self.unreachable = int(numpy.count_nonzero(unreachable))
+        #Path cells that can't reach the exit are explicitly marked.
+        self.maze.saved["Distance"] = colored
+        self.maze.saved.pinned.add("Distance")
+        #The colored maze is saved as "Distance" in self.maze.saved, it is
+        #kept whatever the memory budget as the runners use it.
+        if reached[self.start_point[1], self.start_point[0]] :
+            self.start_distance = int(colored[self.start_point[1], \
+                                              self.start_point[0]])
+            #The value of the start_point is saved as it is a quality index.
+            self.state = "Accessible"
+        else :
+            self.start_distance = None
+            self.state = "Inaccesible"
+        if self.probe is not None :
+            self.probe.add_time("coloration", time.perf_counter()-start_time)
+            self.probe.count("coloration steps", step)
 
     def maze_builder(self):
         """
@@ -252,34 +585,144 @@ class mazy():
         start_time = time.time()
         self.start_point = (1, 1)
         self.exit_point = (self._x-2, self._y-2)
+        key, entry = None, None
+        if self._cache is not None and self.seed is not None \
+            and self._file == '' :
+            if isinstance(self._cache, str) :
+                from cache import cache
+                self._cache = cache(self._cache)
+            workman = self._workman if self._workman != "tiler" else \
+                "tiler {}x{}".format(*self._tile)
+            #The tile size changes the maze, the number of processes doesn't.
+            key = self._cache.key(self._x, self._y, workman, self._tor, \
+                                  self.seed)
+            entry = self._cache.load(key)
+            #Only seeded mazes can be cached, the others can't be rebuilt.
         
-        if self._file == '' :
+        if entry is not None :
+            self.load_cached(entry)
+        elif self._file == '' :
             self.maze.set_values([self.start_point], 2)
             self.maze.set_values([self.exit_point], 3)
             self.supervisor(self._workman)
             
         else :
             self._x, self._y = self.maze._x, self.maze._y
-            for x in range(self._x):
-                for y in range(self._y):
-                    value = self.maze.get_values((x,y))[0]
+            if self.maze.grid.dtype.itemsize < \
+                numpy.dtype(numpy.int_).itemsize :
+                self.maze.grid = self.maze.grid.astype(numpy.int_)
+                #Small integer grids (uint8 binary files) are widened so 
+                #they can hold distances and runner paths.
+            for value in [2, 3]:
+                found = numpy.argwhere(self.maze.grid.T == value)
+                if len(found) != 0 :
                     if value == 2 :
-                        self.start_point = (x, y)
-                        self.drilled.append((x, y))
-                    elif value == 3 :
-                        self.exit_point = (x, y)
-                        self.drilled.append((x, y))
-                    elif value == 1 :
-                        self.drilled.append((x, y))
+                        self.start_point = tuple(found[-1].tolist())
+                    else :
+                        self.exit_point = tuple(found[-1].tolist())
+            #The last start (2) and exit (3) cells in (x, y) order are kept.
+            self.carved = numpy.isin(self.maze.grid, [1, 2, 3])
+            self._drilled = None
             self.maze.save(name="Original")
             
         self.build_time = time.time()-start_time
-        self.compute_path_neighbors()
-        self.maze.display()
-        try :
+        if self.seed is not None :
+            self.random.seed(self.seed)
+            #The runners get the same journeys whether the maze was built or
+            #loaded from the cache.
+        analysed = entry is not None and "Distance" in entry
+        if self._analyse and not analysed :
+            self.compute_path_neighbors()
+        if self._analyse and not self._headless :
+            self.render()
+        if self._analyse and not analysed :
             self.maze_coloration()
-        except :
-            self.state = "Inaccesible"
+        if key is not None and (entry is None or \
+                                (self._analyse and not analysed)) :
+            self._cache.store(key, self.cache_fields())
+        
+    def cache_fields(self):
+        """
+        Give the arrays stored in the cache for this maze : the original 
+        grid, the start and exit points and, once analysed, the adjacency 
+        and the distances.
+
+        Returns
+        -------
+        dict
+
+        """
+        fields = {"Original": self.maze.saved["Original"], \
+                  "points": numpy.array([self.start_point, self.exit_point])}
+        if self.path_dirs is not None and "Distance" in self.maze.saved :
+            fields.update({"path_dirs": self.path_dirs, \
+                           "path_offsets": self.path_offsets, \
+                           "path_indices": self.path_indices, \
+                           "Distance": self.maze.saved["Distance"], \
+                           "start_distance": numpy.array(-1 if \
+                               self.start_distance is None else \
+                               self.start_distance), \
+                           "unreachable": numpy.array(self.unreachable)})
+        return fields
+    
+    def load_cached(self, entry):
+        """
+        Set the maze from the arrays of the cache (see cache_fields) 
+        instead of building it.
+
+        Parameters
+        ----------
+        entry : dict
+            Arrays loaded from the cache.
+
+        Returns
+        -------
+        None.
+
+        """
+        self.maze.grid = entry["Original"].copy()
+        self.maze.save(name="Original")
+        (self.start_point, self.exit_point) = \
+            [tuple(k) for k in entry["points"].tolist()]
+        self.carved = self.maze.grid != 0
+        self._drilled = None
+        if "Distance" in entry and self._analyse :
+            self.path_dirs = entry["path_dirs"]
+            self.path_offsets = entry["path_offsets"]
+            self.path_indices = entry["path_indices"]
+            self._path_neighbors = None
+            self.maze.saved["Distance"] = entry["Distance"]
+            self.maze.saved.pinned.add("Distance")
+            start_distance = int(entry["start_distance"])
+            self.start_distance = None if start_distance < 0 \
+                else start_distance
+            self.state = "Inaccesible" if self.start_distance is None \
+                else "Accessible"
+            self.unreachable = int(entry["unreachable"])
+        if self.probe is not None :
+            self.probe.count("cache hits")
+        
+    def render(self, grid_id="Current", colors="bone"):
+        """
+        Display a maze grid, the time it takes is reported to the probe.
+
+        Parameters
+        ----------
+        grid_id : str, optional
+            Name of the grid in self.maze.saved. The default is "Current".
+        colors : str, optional
+            Color palette. The default is "bone".
+
+        Returns
+        -------
+        None.
+
+        """
+        if self.probe is None :
+            self.maze.display(grid_id, colors)
+            return
+        with self.probe.section("rendering"):
+            self.maze.display(grid_id, colors)
         
     def get_orientation(self, position, prev_position, mode="Relative"):
         """
@@ -336,7 +779,7 @@ class mazy():
                 }
         return orientation
             
-    def ICR(position, neighbors):
+    def ICR(self, position, neighbors):
         """
         ICR is a simple guy, he choose a path randomly.
         ICR stands for I Choose Randomly.
@@ -358,7 +801,7 @@ class mazy():
             Coordinates of the other paths the runner could take later.
 
         """
-        shuffle(neighbors)
+        self.random.shuffle(neighbors)
         return neighbors.pop(), neighbors
     
     def IGR(self, position, prev_position, neighbors):
@@ -489,7 +932,7 @@ class mazy():
 
         """
         if runner == "ICR":
-            return mazy.ICR(position, neighbors)
+            return self.ICR(position, neighbors)
         elif runner == "IGR":
             return self.IGR(position, prev_position, neighbors)
         elif runner == "IGL":
@@ -506,7 +949,7 @@ class mazy():
         else :
             raise ValueError("Unknown runner.")
         
-    def path_shower(self, paths, runner):
+    def path_shower(self, cells, segments, runner):
         """
         Color the maze. The brighter the color is the latest that path as been
         taken. It color the whole path (between 2 intersections) 
@@ -514,8 +957,11 @@ class mazy():
 
         Parameters
         ----------
-        paths : list of list
-            Each sublist is a whole path (between 2 instersections).
+        cells : numpy.ndarray
+            Flat indices of the cells in the order they were taken.
+        segments : numpy.ndarray
+            Offsets in cells of each path (between 2 instersections), 
+            followed by the length of cells.
         runner : str
             Name of the runner.
 
@@ -524,79 +970,117 @@ class mazy():
         None.
 
         """
-        value = 2
-        for path in paths :
-            self.maze.set_values(path, value)
-            value += 1
-            #The paths in the paths list is ordered from the earliest took path
-            #to the latest took path
-        self.maze.save(runner)
-        #The maze grid is saved with its name.
-        self.maze.display(colors="viridis")
-        self.maze.grid = self.maze.saved["Original"].copy()
-        #The maze grid is set back to the clean and original maze in order to 
-        #continue working with it. 
+        values = numpy.repeat(numpy.arange(2, len(segments)+1), \
+                              numpy.diff(segments))
+        #The paths are ordered from the earliest took path to the latest took
+        #path, each one gets the value of the previous one + 1.
+        self.maze.saved.save_delta(runner, cells, values)
+        #Only the taken cells are saved with the runner name, the maze grid
+        #stays the clean and original maze.
+        if not self._headless :
+            self.render(runner, colors="viridis")
+        
+    def get_coordinates(self, indices):
+        """
+        Convert flat indices (as stored in self.runner_path) to coordinates.
 
-    def maze_runner(self, runner="ICR"):
+        Parameters
+        ----------
+        indices : numpy.ndarray
+            Flat indices of the cells.
+
+        Returns
+        -------
+        list of tuple
+            Coordinates (x, y) of the cells.
+
+        """
+        x_size = self.carved.shape[1]
+        return [(k % x_size, k // x_size) for k in numpy.asarray(indices)\
+                .tolist()]
+
+    def explore(self, runner):
         """
-        Algorithm to solve the maze
+        Walk through the maze with the given runner until the exit is 
+        reached, the runner choosing a direction at each intersection and 
+        going back to the last intersection at each deadend.
 
         Parameters
         ----------
-        runner : str, optional
-            Name of the runner. The default is "ICR".
+        runner : str
+            Name of the runner.
 
         Returns
         -------
-        None.
+        explored : list of int
+            Flat indices of the explored cells, in order.
+        path : list of int
+            Flat indices of all the taken paths one after the other.
+        segments : list of int
+            Offset in path of each path (between 2 intersections).
+        backtracks : int
+            Number of deadends met.
+        junctions : int
+            Number of intersections met.
 
         """
-        start_time = time.time()
+        x_size = self.carved.shape[1]
         position = self.start_point
         #position is a tuple with the coordinates of 
         #the current position of the runner. 
-        path = [[position]]
-        #List of all the taken paths where each sublist is a whole path between
-        #2 intersections.
+        path = [position[1]*x_size + position[0]]
+        segments = [0]
+        #Flat indices of all the taken paths one after the other, segments 
+        #saves where each path (between 2 intersections) begins.
         explored = []
-        #List of all explored cells' coordinates. 
+        #List of all explored cells' flat indices. 
+        visited = bytearray(self.carved.size)
+        #Set to 1 for the explored cells.
+        backtracks, junctions = 0, 0
+        #Number of deadends and intersections the runner met.
         intersections = []
         #List of available coordinates of the first cell of explorable paths.
         prev_position = (0, 1)
         #tuple with the coordinates of the previous position the runner was.
         if runner == "IFS":
-            self.flip = bool(randrange(0,2))
+            self.flip = bool(self.random.randrange(0,2))
             #This variable is used to change the runner between IGR and IGL
             #to go right 1 time then left the next time.
         while position != self.exit_point:
             #The runner continues to explore while he hasn't get to 
             #the exit_point 
-            neighbors_raw = self.path_neighbors[position]
+            neighbors_raw = self.get_path_neighbors(position)
             #Raw list of the neighboring cells from the current position.
             #Those neighbors are paths but they could've been already explored.
-            neighbors = [k for k in neighbors_raw if k not in explored]
+            neighbors = [k for k in neighbors_raw \
+                         if not visited[k[1]*x_size + k[0]]]
             #neighbors_raw list filtered as only the unexplored cells remains.
             neighbors_count = len(neighbors)
             #Number of possibilities for the runner to choose.
-            explored.append(position)
+            index = position[1]*x_size + position[0]
+            explored.append(index)
+            visited[index] = 1
+            path.append(index)
+            #The current position is saved in the current path.
             if neighbors_count == 0:
                 #Deadend so the runner goes back to the last intersection.
-                path[-1].append(position)
+                backtracks += 1
                 prev_position, position = position, intersections.pop()
-                path.append([position])
-                #New sublist in path as the runner will take a new path.
+                segments.append(len(path))
+                path.append(position[1]*x_size + position[0])
+                #New path as the runner will take a new path.
             elif neighbors_count > 1:
                 #Intersections so the runner algorithm 
                 #has to choose a direction
+                junctions += 1
                 choice, options = self.runner_selector(runner, position, \
                                                      prev_position, neighbors)
                 #choice is the first cell of the path that the runner 
                 #will take. options is the list of other path the runner could 
                 #take.
-                path[-1].append(position)
-                #The current position is saved in the current path sublist.
-                path.append([choice])
-                #The next position (called choice) is added in a new sublist.
+                segments.append(len(path))
+                path.append(choice[1]*x_size + choice[0])
+                #The next position (called choice) begins a new path.
                 intersections += options
                 #The other paths first cell coordintes are added to the list 
                 #of intersections.
@@ -606,20 +1090,247 @@ class mazy():
             else :
                 #There are no intersection neither deadend so the runner 
                 #continues down the path.
-                path[-1].append(position)
                 prev_position, position = position, neighbors[0]
                 #The current and previous position are updated.
-        self.path_shower(path, runner)
+        return explored, path, segments, backtracks, junctions
+    
+    def neighbor_indices(self, index):
+        """
+        Give the flat indices of the path cells next to a path cell, in the 
+        West, North, East, South order.
+
+        Parameters
+        ----------
+        index : int
+            Flat index of the cell.
+
+        Returns
+        -------
+        list of int
+
+        """
+        x_size = self.carved.shape[1]
+        dirs = int(self.path_dirs.flat[index])
+        return [index+delta for bit, delta in \
+                zip((1, 2, 4, 8), (-1, -x_size, 1, x_size)) if dirs & bit]
+    
+    def IAS(self):
+        """
+        IAS finds the shortest path with the A* algorithm : the cells are 
+        expanded from a binary heap, the most promising first according to 
+        the distance already travelled plus the Manhattan distance to the 
+        exit.
+        IAS stands for I use A Star.
+
+        Returns
+        -------
+        explored : list of int
+            Flat indices of the expanded cells, in order.
+        path : list of int
+            Flat indices of the cells of the shortest path.
+
+        """
+        x_size = self.carved.shape[1]
+        (ex, ey) = self.exit_point
+        start = self.start_point[1]*x_size + self.start_point[0]
+        goal = ey*x_size + ex
+        cost = {start: 0}
+        #Distance travelled to reach each cell.
+        came_from = {start: None}
+        heap = [(abs(ex-self.start_point[0]) + abs(ey-self.start_point[1]),\
+                 0, start)]
+        #Each item is (estimated length, -distance travelled, cell), so the
+        #deepest cell is taken among the equally promising ones.
+        explored = []
+        while len(heap) != 0 :
+            _, travelled, position = heappop(heap)
+            travelled = -travelled
+            if travelled != cost[position] :
+                continue
+                #The cell was reached by a shorter path in the meantime.
+            explored.append(position)
+            if position == goal :
+                break
+            for neighbor in self.neighbor_indices(position):
+                if travelled+1 < cost.get(neighbor, travelled+2) :
+                    cost[neighbor] = travelled+1
+                    came_from[neighbor] = position
+                    heuristic = abs(ex - neighbor % x_size) + \
+                        abs(ey - neighbor // x_size)
+                    heappush(heap, (travelled+1+heuristic, -travelled-1, \
+                                    neighbor))
+        else :
+            raise ValueError("The exit can't be reached.")
+        path = [goal]
+        while came_from[path[-1]] is not None :
+            path.append(came_from[path[-1]])
+        path.reverse()
+        return explored, path
+    
+    def IMM(self):
+        """
+        IMM finds the shortest path with two breadth-first searches, one from 
+        the start and one from the exit. The smallest frontier is expanded 
+        one whole level at a time until they meet.
+        IMM stands for I Meet in the Middle.
+
+        Returns
+        -------
+        explored : list of int
+            Flat indices of the expanded cells, in order.
+        path : list of int
+            Flat indices of the cells of the shortest path.
+
+        """
+        x_size = self.carved.shape[1]
+        start = self.start_point[1]*x_size + self.start_point[0]
+        goal = self.exit_point[1]*x_size + self.exit_point[0]
+        parents = [{start: None}, {goal: None}]
+        depths = [{start: 0}, {goal: 0}]
+        #Cell the search came from and distance to its origin, for the search
+        #from the start and the one from the exit.
+        frontiers = [[start], [goal]]
+        explored = []
+        meeting = start if start == goal else None
+        while meeting is None :
+            if len(frontiers[0]) == 0 or len(frontiers[1]) == 0 :
+                raise ValueError("The exit can't be reached.")
+            side = 0 if len(frontiers[0]) <= len(frontiers[1]) else 1
+            own, other = parents[side], depths[1-side]
+            level, best = [], None
+            for position in frontiers[side]:
+                explored.append(position)
+                for neighbor in self.neighbor_indices(position):
+                    if neighbor in own :
+                        continue
+                    own[neighbor] = position
+                    depths[side][neighbor] = depths[side][position]+1
+                    level.append(neighbor)
+                    if neighbor in other :
+                        length = depths[side][neighbor] + other[neighbor]
+                        if best is None or length < best :
+                            best, meeting = length, neighbor
+                    #The whole level is processed so the shortest meeting 
+                    #is kept.
+            frontiers[side] = level
+        path = [meeting]
+        while parents[0][path[-1]] is not None :
+            path.append(parents[0][path[-1]])
+        path.reverse()
+        while parents[1][path[-1]] is not None :
+            path.append(parents[1][path[-1]])
+        return explored, path
+    
+    def IFD(self):
+        """
+        IFD finds the path by filling the deadends : every path cell with 
+        only one path neighbor (start and exit excepted) is turned into a 
+        wall, pass after pass, until there is no deadend left. Only the 
+        neighbors of the cells filled by a pass can become deadends, so 
+        only them are checked by the next one. In a perfect maze only the 
+        path from the start to the exit remains, a maze with loops is 
+        rejected.
+        IFD stands for I Fill the Deadends.
+
+        Returns
+        -------
+        explored : numpy.ndarray
+            Flat indices of the filled cells, pass after pass.
+        path : numpy.ndarray
+            Flat indices of the remaining cells, from the farthest to the 
+            nearest from the exit.
+
+        """
+        x_size = self.carved.shape[1]
+        distance = self.maze.saved["Distance"].ravel()
+        start = self.start_point[1]*x_size + self.start_point[0]
+        exit_index = self.exit_point[1]*x_size + self.exit_point[0]
+        if distance[start] < 0 :
+            raise ValueError("The exit can't be reached.")
+        flat_dirs = self.path_dirs.ravel()
+        bits = mazy.direction_bits.tolist()
+        deltas = [-1, -x_size, 1, x_size]
+        #Flat index shift of the West, North, East and South directions.
+        opened = self.carved.ravel().copy()
+        degree = sum(((flat_dirs & bit) != 0).astype(numpy.int8) \
+                     for bit in bits)
+        #Number of path neighbors of each cell.
+        kept = numpy.zeros(opened.size, dtype=bool)
+        kept[[start, exit_index]] = True
+        deadends = numpy.flatnonzero(opened & (degree <= 1) & ~kept)
+        filled = []
+        while len(deadends) != 0 :
+            filled.append(deadends)
+            opened[deadends] = False
+            neighbors = numpy.concatenate([
+                deadends[(flat_dirs[deadends] & bit) != 0] + delta \
+                for bit, delta in zip(bits, deltas)])
+            neighbors = neighbors[opened[neighbors]]
+            numpy.subtract.at(degree, neighbors, 1)
+            #Only the neighbors of the filled cells lose path neighbors.
+            deadends = numpy.unique(neighbors[(degree[neighbors] <= 1) & \
+                                              ~kept[neighbors]])
+        index_type = self.path_indices.dtype
+        explored = numpy.concatenate(filled).astype(index_type) \
+            if len(filled) != 0 else numpy.array([], dtype=index_type)
+        path = numpy.flatnonzero(opened).astype(index_type)
+        if len(path) != distance[start]-distance[exit_index]+1 or \
+            numpy.any(degree[path] > 2) :
+            raise ValueError("The maze has loops, IFD only solves perfect "\
+                             "mazes.")
+        #Whatever is left must be the corridor from the start to the exit.
+        return explored, path[numpy.argsort(-distance[path], kind="stable")]
+    
+    def maze_runner(self, runner="ICR"):
+        """
+        Algorithm to solve the maze. The journey of the runner is saved in 
+        self.runner_path as flat indices : "Explored" holds the explored 
+        cells in order, "Path" the cells of every taken path one after the 
+        other and "Segments" the offset of each path in "Path".
+        The runners of mazy.solvers compute the whole path at once, their 
+        "Path" is the shortest path and "Length" its number of steps.
+
+        Parameters
+        ----------
+        runner : str, optional
+            Name of the runner. The default is "ICR".
+
+        Returns
+        -------
+        None.
+
+        """
+        start_time = time.time()
+        journey = {}
+        if runner in mazy.solvers :
+            explored, path = getattr(self, runner)()
+            segments, backtracks, junctions = [0], 0, 0
+            journey["Length"] = len(path)-1
+        else :
+            explored, path, segments, backtracks, junctions = \
+                self.explore(runner)
+        index_type = self.path_indices.dtype
+        path = numpy.array(path, dtype=index_type)
+        segments = numpy.array(segments+[len(path)], dtype=index_type)
+        self.path_shower(path, segments, runner)
         #The journey of the runner is shown and saved.
         duration = time.time()-start_time
         self.runner_path[runner+" {}".format([k[:3] for k in \
-                self.runner_path].count(runner)+1)] = {"Explored": explored, 
+                self.runner_path].count(runner)+1)] = dict({
+                                    "Explored": numpy.array(explored, \
+                                                        dtype=index_type), 
                                     "Path": path,
+                                    "Segments": segments,
                                     "Distance": len(explored), 
-                                    "Duration": duration}
+                                    "Duration": duration}, **journey)
         #The explored cells, the paths that were taken and the total 
         #cell-distance travelled by the runner are saved in the 
         #self.runner_path dictionnary.
+        if self.probe is not None :
+            self.probe.add_time("runner "+runner, duration)
+            self.probe.count("cells explored by "+runner, len(explored))
+            self.probe.count("backtracks of "+runner, backtracks)
+            self.probe.count("intersections visited by "+runner, junctions)
         
     def summary(self):
         """
@@ -633,14 +1344,24 @@ class mazy():
         print("")
         print("Build time : ", self.build_time,"sec.")
         print("")
-        print("There are {} path cells in the maze.".format(len(self.drilled)))
+        print("There are {} path cells in the maze.".format(\
+              int(numpy.count_nonzero(self.carved))))
         print("")
-        print("The quickest path to the exit takes {} steps.".format(\
-              self.start_distance))
+        if self.start_distance is None :
+            print("The exit can't be reached from the start.")
+        else :
+            print("The quickest path to the exit takes {} steps.".format(\
+                  self.start_distance))
+        if self.unreachable != 0 :
+            print("{} path cells can't reach the exit.".format(\
+                  self.unreachable))
         print("")
         for k in self.runner_path:
             print(k,"has made it to the exit in {} steps.".format(\
                   self.runner_path[k]["Distance"]))
+        if self.probe is not None :
+            print("")
+            print(self.probe.report())
 
 
 
@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*-
+"""
+Probe class collecting the timings and counters of a maze build or solve
+
+@author: Alex-932
+@version: 0.1
+"""
+
+from contextlib import contextmanager
+import time
+
+class probe():
+    """
+    Collector given to mazy to see where the time goes. Timings are summed
+    per phase, counters are summed and peaks keep the maximum value.
+    """
+
+    def __init__(self, callback=None):
+        """
+        Initialize an empty probe.
+
+        Parameters
+        ----------
+        callback : callable, optional
+            Called as callback(kind, name, value) for each report, kind being
+            "time", "count" or "peak". The default is None.
+
+        Returns
+        -------
+        None.
+
+        """
+        self.callback = callback
+        self.timings = {}
+        self.calls = {}
+        self.counters = {}
+        self.peaks = {}
+
+    def add_time(self, name, duration):
+        """
+        Add a duration to a phase.
+
+        Parameters
+        ----------
+        name : str
+            Name of the phase.
+        duration : float
+            Duration in seconds.
+
+        Returns
+        -------
+        None.
+
+        """
+        self.timings[name] = self.timings.get(name, 0)+duration
+        self.calls[name] = self.calls.get(name, 0)+1
+        if self.callback is not None :
+            self.callback("time", name, duration)
+
+    @contextmanager
+    def section(self, name):
+        """
+        Context manager timing the code it runs as the given phase.
+
+        Parameters
+        ----------
+        name : str
+            Name of the phase.
+
+        Returns
+        -------
+        None.
+
+        """
+        start_time = time.perf_counter()
+        try :
+            yield
+        finally :
+            self.add_time(name, time.perf_counter()-start_time)
+
+    def count(self, name, value=1):
+        """
+        Add a value to a counter.
+
+        Parameters
+        ----------
+        name : str
+            Name of the counter.
+        value : int, optional
+            Value added. The default is 1.
+
+        Returns
+        -------
+        None.
+
+        """
+        self.counters[name] = self.counters.get(name, 0)+value
+        if self.callback is not None :
+            self.callback("count", name, value)
+
+    def peak(self, name, value):
+        """
+        Keep the highest value seen for a measure.
+
+        Parameters
+        ----------
+        name : str
+            Name of the measure.
+        value : int
+            Value seen.
+
+        Returns
+        -------
+        None.
+
+        """
+        self.peaks[name] = max(self.peaks.get(name, value), value)
+        if self.callback is not None :
+            self.callback("peak", name, value)
+
+    def report(self):
+        """
+        Give the collected values as text.
+
+        Returns
+        -------
+        str
+
+        """
+        lines = ["{} : {:.6f} sec. ({} calls)".format(name, duration, \
+                 self.calls[name]) for name, duration in self.timings.items()]
+        lines += ["{} : {}".format(name, value) for name, value in \
+                  list(self.counters.items())+list(self.peaks.items())]
+        return "\n".join(lines)
@@ -0,0 +1,246 @@
+# -*- coding: utf-8 -*-
+"""
+Recording and rendering of a runner exploration as a stream of changed cells
+
+@author: Alex-932
+@version: 0.1
+"""
+
+from grid import grid
+import numpy
+import os
+
+class recorder():
+    """
+    Event stream of a runner journey : the cells changed at each frame and
+    their new values, applied on top of the original maze. Frames are
+    rendered by applying the changes to a reusable frame buffer.
+    """
+
+    def __init__(self, base, cells, values, frames):
+        """
+        Initialize a recorder from its event stream.
+
+        Parameters
+        ----------
+        base : numpy.ndarray
+            Original maze the changes are applied to.
+        cells : numpy.ndarray
+            Flat indices of the changed cells, in order.
+        values : numpy.ndarray
+            New value of each changed cell.
+        frames : numpy.ndarray
+            Offset in cells of each frame, followed by the number of cells.
+
+        Returns
+        -------
+        None.
+
+        """
+        self.base = numpy.asarray(base)
+        self.cells = numpy.asarray(cells)
+        self.values = numpy.asarray(values)
+        self.frames = numpy.asarray(frames)
+        if len(self.cells) != len(self.values) or \
+            self.frames[-1] != len(self.cells) :
+            raise ValueError("Cells, values and frames don't match.")
+
+    @classmethod
+    def from_run(cls, maze, run, granularity="segment", every=1):
+        """
+        Record a run of mazy.maze_runner. The values are the ones of
+        mazy.path_shower, so the last frame is the saved runner grid.
+
+        Parameters
+        ----------
+        maze : mazy
+            Maze the runner went through.
+        run : str
+            Key of the run in maze.runner_path, for example "ICR 1".
+        granularity : str, optional
+            "segment" for a frame per path (between 2 intersections),
+            "step" for a frame per cell taken, "explored" for a frame per
+            explored cell (visited cells get the value 2).
+            The default is "segment".
+        every : int, optional
+            Number of segments or steps per frame. The default is 1.
+
+        Returns
+        -------
+        recorder
+
+        """
+        journey = maze.runner_path[run]
+        if granularity == "explored" :
+            cells = journey["Explored"]
+            values = numpy.full(len(cells), 2, dtype=numpy.int32)
+            offsets = numpy.arange(len(cells)+1)
+        elif granularity in ["segment", "step"] :
+            cells = journey["Path"]
+            segments = journey["Segments"]
+            values = numpy.repeat(numpy.arange(2, len(segments)+1, \
+                                  dtype=numpy.int32), numpy.diff(segments))
+            offsets = segments if granularity == "segment" else \
+                numpy.arange(len(cells)+1)
+        else :
+            raise ValueError("Unknown granularity.")
+        frames = numpy.append(offsets[:-1:max(1, int(every))], len(cells))
+        return cls(maze.maze.saved["Original"], cells, values, frames)
+
+    def __len__(self):
+        return len(self.frames)-1
+
+    def save(self, file):
+        """
+        Save the event stream as a compressed .npz file.
+
+        Parameters
+        ----------
+        file : str
+            Path of the output file.
+
+        Returns
+        -------
+        None.
+
+        """
+        numpy.savez_compressed(file, base=self.base, cells=self.cells, \
+                               values=self.values, frames=self.frames)
+
+    @classmethod
+    def load(cls, file):
+        """
+        Load an event stream saved with recorder.save.
+
+        Parameters
+        ----------
+        file : str
+            Path of the .npz file.
+
+        Returns
+        -------
+        recorder
+
+        """
+        with numpy.load(file) as stream :
+            return cls(stream["base"], stream["cells"], stream["values"], \
+                       stream["frames"])
+
+    def levels(self, factor=1):
+        """
+        Generator of the frames as colormap indices (see grid.to_levels).
+        The same buffer is updated and yielded for every frame, copy it to
+        keep a frame. The first frame is the original maze.
+
+        Parameters
+        ----------
+        factor : int, optional
+            Upscaling factor, each cell becomes factor*factor pixels.
+            The default is 1.
+
+        Returns
+        -------
+        Generator of numpy.ndarray (y*factor, x*factor) as uint8.
+
+        """
+        (height, width) = self.base.shape
+        last = self.base.astype(numpy.result_type(self.base, self.values))
+        numpy.put(last, self.cells, self.values)
+        low, high = last.min(), last.max()
+        del last
+        #The scale of the last frame is used for every frame.
+        buffer = grid.upscale(grid.to_levels(self.base, low, high), factor)
+        view = buffer.reshape(height, factor, width, factor)
+        #Block of pixels of each cell.
+        changes = grid.to_levels(self.values, low, high)
+        rows, columns = numpy.divmod(self.cells, width)
+        yield buffer
+        for start, stop in zip(self.frames[:-1].tolist(), \
+                               self.frames[1:].tolist()):
+            view[rows[start:stop], :, columns[start:stop], :] = \
+                changes[start:stop, None, None]
+            #Only the cells changed in the frame are redrawn.
+            yield buffer
+
+    def rgb(self, colors="viridis", factor=1):
+        """
+        Generator of the frames as RGB images. The same buffer is updated
+        and yielded for every frame.
+
+        Parameters
+        ----------
+        colors : str, optional
+            Color palette. The default is "viridis".
+        factor : int, optional
+            Upscaling factor. The default is 1.
+
+        Returns
+        -------
+        Generator of numpy.ndarray (y*factor, x*factor, 3) as uint8.
+
+        """
+        table = grid.colormap(colors)
+        image = None
+        for levels in self.levels(factor):
+            image = numpy.take(table, levels, axis=0, out=image)
+            yield image
+
+    def save_frames(self, directory, colors="viridis", factor=1):
+        """
+        Write every frame as a PNG file (frame_00000.png, ...).
+
+        Parameters
+        ----------
+        directory : str
+            Output directory, created if needed.
+        colors : str, optional
+            Color palette. The default is "viridis".
+        factor : int, optional
+            Upscaling factor. The default is 1.
+
+        Returns
+        -------
+        None.
+
+        """
+        os.makedirs(directory, exist_ok=True)
+        for index, image in enumerate(self.rgb(colors, factor)):
+            grid.write_png(os.path.join(directory, "frame_{:05d}.png"\
+                                        .format(index)), image)
+
+    def save_gif(self, file, colors="viridis", factor=1, duration=40, \
+                 loop=0):
+        """
+        Write the frames as an animated GIF. The frames are palette images
+        built from the colormap indices, so nothing is quantized. Needs
+        Pillow.
+
+        Parameters
+        ----------
+        file : str
+            Path of the output file.
+        colors : str, optional
+            Color palette. The default is "viridis".
+        factor : int, optional
+            Upscaling factor. The default is 1.
+        duration : int, optional
+            Duration of a frame in milliseconds. The default is 40.
+        loop : int, optional
+            Number of loops, 0 for endless. The default is 0.
+
+        Returns
+        -------
+        None.
+
+        """
+        from PIL import Image
+        palette = grid.colormap(colors).ravel().tolist()
+        def images():
+            for levels in self.levels(factor):
+                image = Image.fromarray(levels.copy())
+                image.putpalette(palette)
+                yield image
+        frames = images()
+        first = next(frames)
+        first.save(file, save_all=True, append_images=frames, \
+                   duration=duration, loop=loop)
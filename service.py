@@ -0,0 +1,429 @@
+# -*- coding: utf-8 -*-
+"""
+Local maze service answering from pools of pre-generated mazes
+
+The mazes are served over HTTP (or HTTP on a Unix socket), for example :
+python service.py --port 8765 --warm 31x21:IDE 101x101:IPR
+curl "http://127.0.0.1:8765/maze?x=31&y=21&workman=IDE&format=text"
+
+@author: Alex-932
+@version: 0.1
+"""
+
+from mazy import mazy
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import urlsplit, parse_qs
+import argparse
+import asyncio
+import json
+import numpy
+import random
+import signal
+
+workmen = ["IDE", "IGS"]+list(mazy.frontier_workmen)+["gateman", "ISR", \
+                                                       "tiler"]
+#Workmen the service accepts.
+encodings = {"text": "text/plain", "binary": "application/octet-stream"}
+#Encodings of the mazes and their content type.
+
+def generate(job):
+    """
+    Carve one maze and encode it. Runs in the worker processes.
+
+    Parameters
+    ----------
+    job : tuple
+        X size, y size, workman and seed.
+
+    Returns
+    -------
+    dict
+        The maze in every encoding : "text" is readable by grid.import_file
+        and "binary" by grid.import_binary.
+
+    """
+    x, y, workman, seed = job
+    maze = mazy(x, y, workman, headless=True, analyse=False, seed=seed)
+    #Each maze gets its own seed, forked workers would share their state.
+    array = maze.maze.saved["Original"].astype(numpy.uint8)
+    rows = numpy.full((array.shape[0], array.shape[1]+1), ord("\n"), \
+                      dtype=numpy.uint8)
+    rows[:, :-1] = array+ord("0")
+    return {"text": rows.tobytes(), "binary": maze.maze.to_bytes("Original")}
+
+class service():
+    """
+    Keep a pool of pre-generated mazes per warmed (x, y, workman), refilled
+    in the background by worker processes, and answer the requests from
+    them. The other mazes are generated on request, by their own workers so
+    they never wait behind the refills.
+    """
+
+    def __init__(self, pool_size=8, processes=None, max_cells=4001*4001, \
+                 refill_processes=None):
+        """
+        Initialize the service, no process is started yet.
+
+        Parameters
+        ----------
+        pool_size : int, optional
+            Number of mazes kept ready per (x, y, workman).
+            The default is 8.
+        processes : int, optional
+            Number of worker processes building the mazes asked when their 
+            pool is empty or missing. The default is None (one per CPU).
+        max_cells : int, optional
+            Largest maze (x*y) that can be asked. The default is 4001*4001.
+        refill_processes : int, optional
+            Number of worker processes refilling the pools. The default is 
+            None (one per CPU).
+
+        Returns
+        -------
+        None.
+
+        """
+        self._pool_size = max(1, int(pool_size))
+        self._processes = processes
+        self._max_cells = int(max_cells)
+        self._refill_processes = refill_processes
+        self._executors = {}
+        #"request" and "refill" : pool of worker processes.
+        self.pools = {}
+        #(x, y, workman) : asyncio.Queue of generated mazes, only for the 
+        #warmed mazes.
+        self._pending = {}
+        #(x, y, workman) : number of mazes being generated for the pool.
+        self._tasks = set()
+        self.hits, self.misses = 0, 0
+
+    def check(self, x, y, workman):
+        """
+        Check the parameters of a maze.
+
+        Parameters
+        ----------
+        x : int
+            X size of the maze (uneven).
+        y : int
+            Y size of the maze (uneven).
+        workman : str
+            Workman carving the maze.
+
+        Returns
+        -------
+        tuple
+            Key (x, y, workman) of the pool.
+
+        """
+        x, y = int(x), int(y)
+        if x < 5 or y < 5 or x%2 == 0 or y%2 == 0 :
+            raise ValueError("The sizes must be uneven and at least 5.")
+        if x*y > self._max_cells :
+            raise ValueError("The maze can't have more than {} cells."\
+                             .format(self._max_cells))
+        if workman not in workmen :
+            raise ValueError("Unknown workman.")
+        return (x, y, workman)
+
+    async def build(self, key, kind="request"):
+        """
+        Generate a maze in a worker process.
+
+        Parameters
+        ----------
+        key : tuple
+            (x, y, workman) of the maze.
+        kind : str, optional
+            "request" or "refill", the workers used. The default is 
+            "request".
+
+        Returns
+        -------
+        dict
+            The maze in every encoding (see generate).
+
+        """
+        if kind not in self._executors :
+            self._executors[kind] = ProcessPoolExecutor(max_workers=\
+                self._processes if kind == "request" else \
+                self._refill_processes, initializer=signal.signal, \
+                initargs=(signal.SIGINT, signal.SIG_IGN))
+            #Ctrl+C stops the service, the workers let it shut them down.
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executors[kind], generate, \
+                                          key+(random.randrange(2**32),))
+
+    async def fill(self, key):
+        """
+        Generate a maze and put it in its pool.
+
+        Parameters
+        ----------
+        key : tuple
+            (x, y, workman) of the pool.
+
+        Returns
+        -------
+        None.
+
+        """
+        try :
+            maze = await self.build(key, "refill")
+            self.pools[key].put_nowait(maze)
+        finally :
+            self._pending[key] -= 1
+
+    def refill(self, key):
+        """
+        Start the generation of the mazes missing in a pool, without
+        waiting for them. Mazes that weren't warmed have no pool.
+
+        Parameters
+        ----------
+        key : tuple
+            (x, y, workman) of the pool.
+
+        Returns
+        -------
+        None.
+
+        """
+        if key not in self.pools :
+            return
+        missing = self._pool_size-self.pools[key].qsize()-self._pending[key]
+        for k in range(missing):
+            self._pending[key] += 1
+            task = asyncio.get_running_loop().create_task(self.fill(key))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    def warm(self, x, y, workman):
+        """
+        Create and fill the pool of a maze before it is asked, only the 
+        warmed mazes are kept in pools.
+
+        Parameters
+        ----------
+        x : int
+            X size of the maze.
+        y : int
+            Y size of the maze.
+        workman : str
+            Workman carving the maze.
+
+        Returns
+        -------
+        None.
+
+        """
+        key = self.check(x, y, workman)
+        if key not in self.pools :
+            self.pools[key] = asyncio.Queue(maxsize=self._pool_size)
+            self._pending[key] = 0
+        self.refill(key)
+
+    async def get(self, x, y, workman="IDE", encoding="text"):
+        """
+        Give a maze from its pool, or generate it if the pool is empty or 
+        the maze wasn't warmed. The pool is refilled in the background.
+
+        Parameters
+        ----------
+        x : int
+            X size of the maze.
+        y : int
+            Y size of the maze.
+        workman : str, optional
+            Workman carving the maze. The default is "IDE".
+        encoding : str, optional
+            "text" or "binary". The default is "text".
+
+        Returns
+        -------
+        bytes
+
+        """
+        key = self.check(x, y, workman)
+        if encoding not in encodings :
+            raise ValueError("Unknown encoding.")
+        pool = self.pools.get(key)
+        if pool is not None and not pool.empty() :
+            maze = pool.get_nowait()
+            self.hits += 1
+        else :
+            maze = await self.build(key)
+            self.misses += 1
+        self.refill(key)
+        return maze[encoding]
+
+    def status(self):
+        """
+        Give the state of the pools.
+
+        Returns
+        -------
+        dict
+
+        """
+        return {"hits": self.hits, "misses": self.misses, "pools": [
+            {"x": key[0], "y": key[1], "workman": key[2], \
+             "ready": pool.qsize(), "pending": self._pending[key]} \
+            for key, pool in self.pools.items()]}
+
+    async def respond(self, writer, code, body, content_type="text/plain"):
+        """
+        Write an HTTP response.
+
+        Parameters
+        ----------
+        writer : asyncio.StreamWriter
+        code : int
+            Status code.
+        body : bytes
+        content_type : str, optional
+            The default is "text/plain".
+
+        Returns
+        -------
+        None.
+
+        """
+        reasons = {200: "OK", 400: "Bad Request", 404: "Not Found", \
+                   405: "Method Not Allowed"}
+        writer.write("HTTP/1.1 {} {}\r\nContent-Type: {}\r\n"\
+                     "Content-Length: {}\r\nConnection: close\r\n\r\n"\
+                     .format(code, reasons[code], content_type, len(body))\
+                     .encode()+body)
+        await writer.drain()
+
+    async def handle(self, reader, writer):
+        """
+        Answer one HTTP request : GET /maze?x=&y=&workman=&format= gives a
+        maze, GET /status the state of the pools.
+
+        Parameters
+        ----------
+        reader : asyncio.StreamReader
+        writer : asyncio.StreamWriter
+
+        Returns
+        -------
+        None.
+
+        """
+        try :
+            request = (await reader.readline()).decode("latin-1").split()
+            while (await reader.readline()) not in [b"\r\n", b"\n", b""] :
+                pass
+            #The headers are not used.
+            if len(request) < 2 or request[0] != "GET" :
+                await self.respond(writer, 405, b"Only GET is supported.\n")
+                return
+            url = urlsplit(request[1])
+            query = {name: values[-1] for name, values in \
+                     parse_qs(url.query).items()}
+            if url.path == "/maze" :
+                encoding = query.get("format", "text")
+                try :
+                    body = await self.get(query.get("x", 31), \
+                                          query.get("y", 21), \
+                                          query.get("workman", "IDE"), \
+                                          encoding)
+                except ValueError as error :
+                    await self.respond(writer, 400, \
+                                       (str(error)+"\n").encode())
+                    return
+                await self.respond(writer, 200, body, encodings[encoding])
+            elif url.path == "/status" :
+                await self.respond(writer, 200, \
+                                   json.dumps(self.status()).encode(), \
+                                   "application/json")
+            else :
+                await self.respond(writer, 404, b"Unknown path.\n")
+        except ConnectionError :
+            pass
+        finally :
+            writer.close()
+
+    async def serve(self, host="127.0.0.1", port=8765, path=None, \
+                    warm=()):
+        """
+        Serve the mazes until cancelled.
+
+        Parameters
+        ----------
+        host : str, optional
+            Address to listen on. The default is "127.0.0.1".
+        port : int, optional
+            TCP port. The default is 8765.
+        path : str, optional
+            Unix socket path, used instead of host and port.
+            The default is None.
+        warm : iterable of tuple, optional
+            (x, y, workman) of the pools to fill at start. The default is ().
+
+        Returns
+        -------
+        None.
+
+        """
+        for x, y, workman in warm :
+            self.warm(x, y, workman)
+        if path is None :
+            server = await asyncio.start_server(self.handle, host, port)
+        else :
+            server = await asyncio.start_unix_server(self.handle, path)
+        try :
+            async with server :
+                await server.serve_forever()
+        finally :
+            self.close()
+
+    def close(self):
+        """
+        Stop the worker processes.
+
+        Returns
+        -------
+        None.
+
+        """
+        for task in list(self._tasks):
+            task.cancel()
+        for executor in self._executors.values():
+            executor.shutdown(wait=False, cancel_futures=True)
+        self._executors = {}
+
+def main(arguments=None):
+    parser = argparse.ArgumentParser(description="Local maze service "\
+                                     "answering from pre-generated pools.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--unix", default=None,
+                        help="Unix socket path, used instead of the port")
+    parser.add_argument("--pool", type=int, default=8,
+                        help="Mazes kept ready per size and workman")
+    parser.add_argument("--processes", type=int, default=None,
+                        help="Workers for the mazes without a ready one")
+    parser.add_argument("--refill-processes", type=int, default=None,
+                        help="Workers refilling the pools")
+    parser.add_argument("--warm", nargs="+", default=[],
+                        help="Pools to fill at start, as XxY:workman")
+    arguments = parser.parse_args(arguments)
+    warm = []
+    for pool in arguments.warm :
+        size, _, workman = pool.partition(":")
+        x, y = size.lower().split("x")
+        warm.append((int(x), int(y), workman or "IDE"))
+    maze_service = service(arguments.pool, arguments.processes, \
+                           refill_processes=arguments.refill_processes)
+    try :
+        asyncio.run(maze_service.serve(arguments.host, arguments.port, \
+                                       arguments.unix, warm))
+    except KeyboardInterrupt :
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,236 @@
+# -*- coding: utf-8 -*-
+"""
+Snapshot store used by grid to save its arrays
+
+@author: Alex-932
+@version: 0.1
+"""
+
+from collections import OrderedDict
+from collections.abc import MutableMapping
+import numpy
+
+class snapshots(MutableMapping):
+    """
+    Dict-like store of named arrays. The base array ("Original") is kept in
+    full, the others are kept as sparse deltas against it when they differ
+    in few cells, and are only materialized when they are read. A memory
+    budget can be set, the least recently used snapshots being evicted
+    first (the base and the pinned snapshots are never evicted).
+    """
+
+    def __init__(self, base="Original", budget=None, ratio=.25, pinned=()):
+        """
+        Initialize an empty store.
+
+        Parameters
+        ----------
+        base : str, optional
+            Name of the base array. The default is "Original".
+        budget : int, optional
+            Memory budget in bytes. The default is None (no limit).
+        ratio : float, optional
+            Arrays are stored as deltas when the delta takes less than
+            this part of the full array. The default is .25.
+        pinned : iterable of str, optional
+            Snapshots that are never evicted. The default is ().
+
+        Returns
+        -------
+        None.
+
+        """
+        self.base = base
+        self.budget = budget
+        self.ratio = float(ratio)
+        self.pinned = set(pinned)
+        self._full = {}
+        #Arrays stored in full, the base included.
+        self._deltas = {}
+        #name : (flat indices, values, shape) of the cells differing from
+        #the base.
+        self._cache = OrderedDict()
+        #Materialized deltas, least recently used first.
+        self._used = OrderedDict()
+        #Names of the snapshots, least recently used first.
+
+    def __len__(self):
+        return len(self._used)
+
+    def __iter__(self):
+        return iter(list(self._used))
+
+    def __contains__(self, name):
+        return name in self._used
+
+    def __getitem__(self, name):
+        if name not in self._used :
+            raise KeyError(name)
+        self._used.move_to_end(name)
+        if name in self._full :
+            return self._full[name]
+        if name not in self._cache :
+            self._cache[name] = self.materialize(name)
+            self.enforce_budget(keep=name)
+        self._cache.move_to_end(name)
+        return self._cache[name]
+
+    def __setitem__(self, name, array):
+        array = numpy.array(array)
+        #The store keeps its own copy, like dict(grid.copy()).
+        if name == self.base :
+            self.rebase(array)
+            return
+        self.discard(name)
+        base = self._full.get(self.base)
+        if base is not None and base.shape == array.shape :
+            indices = numpy.flatnonzero(array != base)
+            delta_size = indices.size*(indices.itemsize+array.itemsize)
+            if delta_size < array.nbytes*self.ratio :
+                self._deltas[name] = (indices, array.ravel()[indices], \
+                                      array.shape)
+                self._used[name] = None
+                self.enforce_budget(keep=name)
+                return
+        self._full[name] = array
+        self._used[name] = None
+        self.enforce_budget(keep=name)
+
+    def __delitem__(self, name):
+        if name not in self._used :
+            raise KeyError(name)
+        self.discard(name)
+
+    def discard(self, name):
+        """
+        Remove a snapshot and its materialized copy if they exist.
+
+        Parameters
+        ----------
+        name : str
+            Name of the snapshot.
+
+        Returns
+        -------
+        None.
+
+        """
+        self._full.pop(name, None)
+        self._deltas.pop(name, None)
+        self._cache.pop(name, None)
+        self._used.pop(name, None)
+
+    def save_delta(self, name, indices, values):
+        """
+        Save a snapshot as the base with some cells changed, without
+        building the full array.
+
+        Parameters
+        ----------
+        name : str
+            Name of the snapshot.
+        indices : numpy.ndarray
+            Flat indices of the changed cells. When a cell is given several
+            times, the last value is kept.
+        values : numpy.ndarray or float
+            Values of the changed cells.
+
+        Returns
+        -------
+        None.
+
+        """
+        base = self._full[self.base]
+        indices = numpy.asarray(indices)
+        values = numpy.broadcast_to(numpy.asarray(values, \
+                                    dtype=base.dtype), indices.shape)
+        last = indices.size-1-numpy.unique(indices[::-1], \
+                                           return_index=True)[1]
+        #Position of the last occurrence of each cell.
+        self.discard(name)
+        self._deltas[name] = (indices[last], values[last].copy(), \
+                              base.shape)
+        self._used[name] = None
+        self.enforce_budget(keep=name)
+
+    def materialize(self, name):
+        """
+        Build the full array of a snapshot stored as a delta.
+
+        Parameters
+        ----------
+        name : str
+            Name of the snapshot.
+
+        Returns
+        -------
+        numpy.ndarray
+
+        """
+        indices, values, _ = self._deltas[name]
+        array = self._full[self.base].astype(values.dtype)
+        numpy.put(array, indices, values)
+        return array
+
+    def rebase(self, array):
+        """
+        Replace the base array, the deltas are rebuilt against it.
+
+        Parameters
+        ----------
+        array : numpy.ndarray
+            New base array.
+
+        Returns
+        -------
+        None.
+
+        """
+        names = list(self._deltas)
+        arrays = [self.materialize(name) for name in names]
+        for name in names :
+            self.discard(name)
+        self._full[self.base] = array
+        self._used[self.base] = None
+        self._used.move_to_end(self.base, last=False)
+        for name, snapshot in zip(names, arrays):
+            self[name] = snapshot
+
+    @property
+    def nbytes(self):
+        """
+        Memory used by the stored and materialized arrays, in bytes.
+        """
+        total = sum(array.nbytes for array in self._full.values())
+        total += sum(indices.nbytes+values.nbytes for indices, values, _ \
+                     in self._deltas.values())
+        return total+sum(array.nbytes for array in self._cache.values())
+
+    def enforce_budget(self, keep=None):
+        """
+        Evict materialized copies, then whole snapshots, the least recently
+        used first, until the store fits in the budget. The base, the pinned
+        snapshots and the keep one are never evicted.
+
+        Parameters
+        ----------
+        keep : str, optional
+            Snapshot that was just used. The default is None.
+
+        Returns
+        -------
+        None.
+
+        """
+        if self.budget is None :
+            return
+        for name in list(self._cache):
+            if self.nbytes <= self.budget :
+                return
+            if name != keep :
+                del self._cache[name]
+        for name in list(self._used):
+            if self.nbytes <= self.budget :
+                return
+            if name not in (self.base, keep) and name not in self.pinned :
+                self.discard(name)
@@ -0,0 +1,162 @@
+# -*- coding: utf-8 -*-
+"""
+Row by row maze generation (Eller's algorithm) with constant memory
+
+@author: Alex-932
+@version: 0.1
+"""
+
+import numpy
+
+class streamer():
+    """
+    Generate a perfect maze one row at a time, only the sets of the current
+    row of cells are kept in memory. The rows are written in a file readable
+    by grid.import_file and/or given to a callback.
+    """
+
+    def __init__(self, x, y, file=None, callback=None, merge=.5, drop=.5, \
+                 seed=None):
+        """
+        Initialize the streamer.
+
+        Parameters
+        ----------
+        x : int
+            X size of the maze (uneven).
+        y : int
+            Y size of the maze (uneven).
+        file : str, optional
+            Path of the output file. The default is None.
+        callback : callable, optional
+            Called as callback(index, row) for each row of the maze, row
+            being a numpy array of the cell values. The default is None.
+        merge : float, optional
+            Probability of opening the wall between two cells of a row that
+            are in different sets. The default is .5.
+        drop : float, optional
+            Probability of opening the wall below a cell, on top of the one
+            that is always opened for each set. The default is .5.
+        seed : int, optional
+            Seed of the random generator. The default is None (the global
+            numpy.random state).
+
+        Returns
+        -------
+        None.
+
+        """
+        if x < 3 or y < 3 or x%2 == 0 or y%2 == 0 :
+            raise ValueError("The sizes must be uneven and at least 3.")
+        self._x = int(x)
+        self._y = int(y)
+        self._file = file
+        self._callback = callback
+        self._merge = float(merge)
+        self._drop = float(drop)
+        self._rng = numpy.random if seed is None else \
+            numpy.random.default_rng(seed)
+
+    @staticmethod
+    def find(parent, label):
+        """
+        Give the set a label belongs to (union-find with path compression).
+
+        Parameters
+        ----------
+        parent : dict
+            Parent of each label, the root of a set is its own parent.
+        label : int
+            Label of a cell.
+
+        Returns
+        -------
+        int
+            Label of the set.
+
+        """
+        root = label
+        while parent[root] != root :
+            root = parent[root]
+        while parent[label] != root :
+            parent[label], label = root, parent[label]
+        return root
+
+    def rows(self):
+        """
+        Generator of the rows of the maze, from the top to the bottom.
+        Walls are 0, paths 1, the start (1, 1) is 2 and the exit
+        (x-2, y-2) is 3.
+
+        Returns
+        -------
+        Generator of numpy.ndarray (uint8).
+
+        """
+        width, height = (self._x-1)//2, (self._y-1)//2
+        #Number of cells on a row and on a column.
+        yield numpy.zeros(self._x, dtype=numpy.uint8)
+        labels = numpy.arange(width)
+        next_label = width
+        #Set of each cell of the current row, new sets get new labels.
+        for k in range(height):
+            last = k == height-1
+            parent = {label: label for label in labels.tolist()}
+            merges = (self._rng.random(width-1) < self._merge).tolist()
+            cells = labels.tolist()
+            opened = []
+            for j in range(width-1):
+                if last or merges[j] :
+                    left = streamer.find(parent, cells[j])
+                    right = streamer.find(parent, cells[j+1])
+                    if left != right :
+                        parent[right] = left
+                        opened.append(j)
+                        #The wall between the cells is opened and their sets
+                        #are joined.
+            row = numpy.zeros(self._x, dtype=numpy.uint8)
+            row[1::2] = 1
+            row[2*numpy.array(opened, dtype=numpy.int64)+2] = 1
+            if k == 0 :
+                row[1] = 2
+            if last :
+                row[-2] = 3
+            yield row
+            if last :
+                break
+            roots = numpy.array([streamer.find(parent, label) \
+                                 for label in cells])
+            drops = self._rng.random(width) < self._drop
+            order = self._rng.permutation(width)
+            _, first = numpy.unique(roots[order], return_index=True)
+            drops[order[first]] = True
+            #Each set goes down at least once, through a random cell.
+            below = numpy.zeros(self._x, dtype=numpy.uint8)
+            below[1::2] = drops
+            yield below
+            labels = numpy.where(drops, roots, numpy.arange(next_label, \
+                                                    next_label+width))
+            next_label += width
+            #The cells that are not connected to the upper row get new sets.
+        yield numpy.zeros(self._x, dtype=numpy.uint8)
+
+    def run(self):
+        """
+        Generate the maze, writing each row in the file and/or giving it to
+        the callback as soon as it is done.
+
+        Returns
+        -------
+        None.
+
+        """
+        output = open(self._file, "wb") if self._file is not None else None
+        try :
+            for index, row in enumerate(self.rows()):
+                if output is not None :
+                    output.write((row+ord('0')).tobytes()+b"\n")
+                if self._callback is not None :
+                    self._callback(index, row)
+        finally :
+            if output is not None :
+                output.close()
@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+"""
+Tests of the grid class
+
+@author: Alex-932
+@version: 0.1
+"""
+
+from grid import grid
+import pytest
+
+@pytest.mark.parametrize("content, message", [
+    (b"0101\n011\n", "same width"),
+    (b"0101\n01a1\n", "non-digit")])
+@pytest.mark.parametrize("use_mmap", [True, False])
+def test_import_file_errors(tmp_path, content, message, use_mmap):
+    file = tmp_path / "maze.txt"
+    file.write_bytes(content)
+    with pytest.raises(ValueError, match=message):
+        grid(1, 1).import_file(str(file), use_mmap=use_mmap)
+
+@pytest.mark.parametrize("tor", [False, True])
+@pytest.mark.parametrize("pattern", ["+", "O"])
+def test_cached_neighbors(tor, pattern):
+    cached, plain = grid(6, 5, tor=tor), grid(6, 5, tor=tor)
+    cached.compute_neighbors(length=1, pattern=pattern)
+    find = "get_neighbors_tor" if tor else "get_neighbors"
+    for coord in [(0, 0), (5, 4), (2, 3), (6, 2)]:
+        assert getattr(cached, find)(coord, pattern=pattern) == \
+            getattr(plain, find)(coord, pattern=pattern)
+    assert cached.neighbor_table(6, 5, tor, 1, pattern).shape[0] == 30
+
+def test_export_overwrites(tmp_path):
+    file = str(tmp_path / "maze.txt")
+    maze = grid(5, 3, value=1)
+    maze.save("Original")
+    maze.export("Original", file=file)
+    maze.export("Original", file=file)
+    assert grid(1, 1, file=file).grid.shape == (3, 5)
+
+def test_neighbor_table_cache_bytes(monkeypatch):
+    grid.clear_neighbor_tables()
+    table = grid.neighbor_table(20, 10)
+    assert grid.neighbor_table(20, 10) is table
+    monkeypatch.setattr(grid, "neighbor_cache_bytes", table.nbytes)
+    grid.neighbor_table(10, 20)
+    assert list(grid._neighbor_tables) == [(10, 20, False, 1, 'O')]
+    assert grid.neighbor_table(40, 10) is not grid.neighbor_table(40, 10)
+    grid.clear_neighbor_tables()
+    assert len(grid._neighbor_tables) == 0
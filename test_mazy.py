@@ -0,0 +1,31 @@
+# -*- coding: utf-8 -*-
+"""
+Tests of the mazy class
+
+@author: Alex-932
+@version: 0.1
+"""
+
+from mazy import mazy
+import pytest
+
+def test_IFD_matches_IAS():
+    maze = mazy(61, 41, "IPR", headless=True, seed=2)
+    maze.maze_runner("IFD")
+    maze.maze_runner("IAS")
+    assert maze.runner_path["IFD 1"]["Length"] == \
+        maze.runner_path["IAS 1"]["Length"] == maze.start_distance-3
+    assert (maze.runner_path["IFD 1"]["Path"] == \
+            maze.runner_path["IAS 1"]["Path"]).all()
+
+def test_IFD_unreachable_exit():
+    maze = mazy(41, 41, "gateman", headless=True, seed=3)
+    assert maze.state == "Inaccesible"
+    with pytest.raises(ValueError, match="can't be reached"):
+        maze.maze_runner("IFD")
+
+def test_IFD_rejects_loops():
+    maze = mazy(21, 21, "gateman", headless=True, seed=5)
+    assert maze.state == "Accessible"
+    with pytest.raises(ValueError, match="loops"):
+        maze.maze_runner("IFD")
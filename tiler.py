@@ -0,0 +1,232 @@
+# -*- coding: utf-8 -*-
+"""
+Tiled maze generation over a pool of processes
+
+@author: Alex-932
+@version: 0.1
+"""
+
+from grid import grid
+from mazy import mazy
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+import numpy
+import random
+
+def carve_tile(job):
+    """
+    Carve one tile with drillerman and write it in the shared array. Runs in
+    the worker processes, nothing but the job is pickled.
+
+    Parameters
+    ----------
+    job : tuple
+        Shared memory name or file path, shape (y, x) of the maze, position
+        (x, y) of the tile top left corner in the maze, size (x, y) of the
+        tile, workman and seed.
+
+    Returns
+    -------
+    None.
+
+    """
+    storage, shape, corner, size, workman, seed = job
+    tile = mazy(size[0], size[1], workman, headless=True, analyse=False, \
+                seed=seed)
+    #Each tile gets its own seed, forked workers would share their state.
+    (x0, y0) = corner
+    if storage.startswith("shm:") :
+        memory = shared_memory.SharedMemory(name=storage[4:])
+        maze = numpy.ndarray(shape, dtype=numpy.uint8, buffer=memory.buf)
+        maze[y0+1:y0+size[1]-1, x0+1:x0+size[0]-1] = tile.carved[1:-1, 1:-1]
+        del maze
+        memory.close()
+    else :
+        maze = numpy.memmap(storage, dtype=numpy.uint8, mode="r+", \
+                            offset=grid.binary_header.size, shape=shape)
+        maze[y0+1:y0+size[1]-1, x0+1:x0+size[0]-1] = tile.carved[1:-1, 1:-1]
+        maze.flush()
+    #Only the inside of the tile is written, its border walls are shared
+    #with the neighboring tiles.
+
+class tiler():
+    """
+    Split a maze into tiles carved independently in a pool of processes,
+    then join the tiles by opening passages in the walls between them.
+    """
+
+    def __init__(self, x, y, tile=(128, 128), workman="IPR", perfect=True, \
+                 passages=1, processes=None, file=None, seed=None):
+        """
+        Initialize the tiler.
+
+        Parameters
+        ----------
+        x : int
+            X size of the maze (uneven).
+        y : int
+            Y size of the maze (uneven).
+        tile : tuple, optional
+            Size of a tile in cells (x, y). The default is (128, 128).
+        workman : str, optional
+            drillerman workman carving the tiles. The default is "IPR".
+        perfect : bool, optional
+            Join the tiles along a random spanning tree with one passage
+            each, so the maze stays perfect. Else every pair of neighboring
+            tiles gets passages. The default is True.
+        passages : int, optional
+            Number of passages between two neighboring tiles when perfect
+            is False. The default is 1.
+        processes : int, optional
+            Number of worker processes. The default is None (one per CPU).
+            With 1, everything is done in the current process.
+        file : str, optional
+            Binary maze file (see grid.export_binary) the tiles are written
+            into, memory-mapped. The default is None (shared memory).
+        seed : int, optional
+            Seed of the tile seeds and of the passages. The default is None
+            (the global random state).
+
+        Returns
+        -------
+        None.
+
+        """
+        if x < 3 or y < 3 or x%2 == 0 or y%2 == 0 :
+            raise ValueError("The sizes must be uneven and at least 3.")
+        self._x = int(x)
+        self._y = int(y)
+        self._tile = (max(1, int(tile[0])), max(1, int(tile[1])))
+        self._workman = workman
+        self._perfect = perfect
+        self._passages = int(passages)
+        self._processes = processes
+        self._file = file
+        self._random = random if seed is None else random.Random(seed)
+
+    def bounds(self, cells, tile):
+        """
+        Split a row or column of cells into tiles.
+
+        Parameters
+        ----------
+        cells : int
+            Number of cells.
+        tile : int
+            Number of cells of a tile.
+
+        Returns
+        -------
+        list of tuple
+            First cell and cell after the last one of each tile.
+
+        """
+        return [(k, min(k+tile, cells)) for k in range(0, cells, tile)]
+
+    def joints(self, columns, rows):
+        """
+        Choose the pairs of neighboring tiles to join.
+
+        Parameters
+        ----------
+        columns : int
+            Number of tiles on a row.
+        rows : int
+            Number of tiles on a column.
+
+        Returns
+        -------
+        list of tuple
+            Pairs of tiles ((column, row), (column, row)).
+
+        """
+        pairs = [((j, k), (j+1, k)) for k in range(rows) \
+                 for j in range(columns-1)] + \
+                [((j, k), (j, k+1)) for k in range(rows-1) \
+                 for j in range(columns)]
+        if not self._perfect :
+            return pairs
+        self._random.shuffle(pairs)
+        parent = {(j, k): (j, k) for k in range(rows) for j in range(columns)}
+        def find(tile):
+            while parent[tile] != tile :
+                parent[tile] = parent[parent[tile]]
+                tile = parent[tile]
+            return tile
+        tree = []
+        for first, second in pairs :
+            if find(first) != find(second) :
+                parent[find(second)] = find(first)
+                tree.append((first, second))
+        #Random spanning tree of the tiles (Kruskal).
+        return tree
+
+    def run(self):
+        """
+        Carve the tiles in parallel and join them.
+
+        Returns
+        -------
+        numpy.ndarray
+            The maze (uint8) : walls are 0, paths 1, the start (1, 1) is 2 and
+            the exit (x-2, y-2) is 3. It is a memmap of the file if one was
+            given.
+
+        """
+        shape = (self._y, self._x)
+        columns = self.bounds((self._x-1)//2, self._tile[0])
+        rows = self.bounds((self._y-1)//2, self._tile[1])
+        if self._file is None :
+            memory = shared_memory.SharedMemory(create=True, \
+                                                size=self._x*self._y)
+            storage = "shm:"+memory.name
+            maze = numpy.ndarray(shape, dtype=numpy.uint8, buffer=memory.buf)
+            maze[...] = 0
+        else :
+            with open(self._file, "wb") as output :
+                output.write(grid.binary_header.pack(grid.binary_magic, 1, \
+                    grid.binary_layouts.index("raw"), \
+                    numpy.dtype(numpy.uint8).str.encode(), self._x, self._y, \
+                    1, 1, self._x-2, self._y-2))
+                output.truncate(grid.binary_header.size+self._x*self._y)
+            storage = self._file
+            maze = numpy.memmap(self._file, dtype=numpy.uint8, mode="r+", \
+                                offset=grid.binary_header.size, shape=shape)
+        try :
+            jobs = [(storage, shape, (2*c0, 2*r0), \
+                     (2*(c1-c0)+1, 2*(r1-r0)+1), self._workman, \
+                     self._random.randrange(2**32)) \
+                    for (r0, r1) in rows for (c0, c1) in columns]
+            if self._processes == 1 :
+                list(map(carve_tile, jobs))
+            else :
+                with ProcessPoolExecutor(max_workers=self._processes) as pool :
+                    list(pool.map(carve_tile, jobs))
+            for first, second in self.joints(len(columns), len(rows)):
+                count = 1 if self._perfect else self._passages
+                if first[1] == second[1] :
+                    (r0, r1) = rows[first[1]]
+                    wall = 2*columns[second[0]][0]
+                    #Column of walls between the tiles.
+                    for cell in self._random.sample(range(r0, r1), \
+                                                    min(count, r1-r0)):
+                        maze[2*cell+1, wall] = 1
+                else :
+                    (c0, c1) = columns[first[0]]
+                    wall = 2*rows[second[1]][0]
+                    for cell in self._random.sample(range(c0, c1), \
+                                                    min(count, c1-c0)):
+                        maze[wall, 2*cell+1] = 1
+            maze[1, 1] = 2
+            maze[self._y-2, self._x-2] = 3
+            if self._file is None :
+                result = maze.copy()
+            else :
+                maze.flush()
+                result = maze
+        finally :
+            if self._file is None :
+                del maze
+                memory.close()
+                memory.unlink()
+        return result